@@ -0,0 +1,206 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+import multiprocessing
+import threading
+
+from shared_cache import SharedCache, SharedRing
+
+ALERT_TYPES = ("positive", "negative", "overall")
+ALERT_CONDITIONS = ("above", "below")
+
+
+# === ALERT ENGINE ===
+# Enabled alerts live in one sorted (threshold, alert_id) list per
+# (coin_id, alert_type, condition). A move from previous to current value only
+# fires thresholds strictly crossed by that move, which is a contiguous slice
+# found by binary search:
+#   above: previous <= threshold < current
+#   below: current < threshold <= previous
+# Staying on the same side of a threshold never fires again (edge-triggered),
+# and a point is evaluated at most once per coin (newer timestamps only).
+#
+# With preforked workers every process keeps its own index, and `shared` (a
+# SharedAlertState) holds what the workers must agree on: the last point per
+# coin, the fired history and a version bumped by every alert change, which
+# tells the other workers to rebuild their index.
+class AlertEngine:
+    # coins: how many coins' last points are kept (least recently evaluated
+    # go first); an evicted coin's next point only sets a new baseline
+    def __init__(self, history=500, shared=None, coins=1024):
+        self._thresholds = {}
+        self._ids = {}
+        self._alerts = {}
+        self._last = OrderedDict()
+        self.coins = coins
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=history)
+        self.shared = shared
+        self.loaded = False
+        self.version = None
+
+    def stale(self):
+        return not self.loaded or (self.shared is not None and self.version != self.shared.version)
+
+    def shared_version(self):
+        return self.shared.version if self.shared is not None else None
+
+    # version: shared_version() read before the alerts were loaded
+    def rebuild(self, alerts, version=None):
+        with self._lock:
+            self._thresholds.clear()
+            self._ids.clear()
+            self._alerts.clear()
+            entries = {}
+            for alert in alerts:
+                if alert["enabled"]:
+                    key = (alert["coin_id"], alert["alert_type"], alert["condition"])
+                    entries.setdefault(key, []).append((float(alert["threshold"]), alert["id"]))
+                    self._alerts[alert["id"]] = alert
+            for key, pairs in entries.items():
+                pairs.sort()
+                self._thresholds[key] = [threshold for threshold, _ in pairs]
+                self._ids[key] = [alert_id for _, alert_id in pairs]
+            self.loaded = True
+            self.version = version
+
+    # call after add()/remove() for a stored change; an index that was current
+    # stays current, every other worker's goes stale
+    def changed(self):
+        if self.shared is not None:
+            previous = self.shared.bump()
+            if self.version == previous:
+                self.version = previous + 1
+
+    def add(self, alert):
+        with self._lock:
+            self._remove(alert["id"])
+            if not alert["enabled"]:
+                return
+            key = (alert["coin_id"], alert["alert_type"], alert["condition"])
+            thresholds = self._thresholds.setdefault(key, [])
+            ids = self._ids.setdefault(key, [])
+            position = bisect_right(thresholds, float(alert["threshold"]))
+            thresholds.insert(position, float(alert["threshold"]))
+            ids.insert(position, alert["id"])
+            self._alerts[alert["id"]] = alert
+
+    def remove(self, alert_id):
+        with self._lock:
+            self._remove(alert_id)
+
+    def _remove(self, alert_id):
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return
+        key = (alert["coin_id"], alert["alert_type"], alert["condition"])
+        thresholds, ids = self._thresholds[key], self._ids[key]
+        position = bisect_left(thresholds, float(alert["threshold"]))
+        while ids[position] != alert_id:
+            position += 1
+        del thresholds[position]
+        del ids[position]
+
+    def evaluate(self, coin_id, timestamp, values):
+        fired = []
+        previous_values = self._advance(coin_id, timestamp, values)
+        if previous_values is None:
+            return fired
+
+        with self._lock:
+            for alert_type in ALERT_TYPES:
+                previous, current = previous_values.get(alert_type), values.get(alert_type)
+                if previous is None or current is None or previous == current:
+                    continue
+                if current > previous:
+                    key = (coin_id, alert_type, "above")
+                    thresholds = self._thresholds.get(key)
+                    if thresholds:
+                        lo, hi = bisect_left(thresholds, previous), bisect_left(thresholds, current)
+                        fired += self._fire(key, lo, hi, timestamp, previous, current)
+                else:
+                    key = (coin_id, alert_type, "below")
+                    thresholds = self._thresholds.get(key)
+                    if thresholds:
+                        lo, hi = bisect_right(thresholds, current), bisect_right(thresholds, previous)
+                        fired += self._fire(key, lo, hi, timestamp, previous, current)
+            if self.shared is None:
+                self.recent.extend(fired)
+
+        if fired and self.shared is not None:
+            self.shared.recent.extend(fired)
+        return fired
+
+    # stores the point as the coin's latest and returns the values it replaces;
+    # None for the first point of a coin, or one that is not newer
+    def _advance(self, coin_id, timestamp, values):
+        if self.shared is not None:
+            with self.shared.lock:
+                cached = self.shared.last.get(coin_id)
+                last = cached[0] if cached is not None else None
+                if last is not None and timestamp <= last[0]:
+                    return None
+                self.shared.last.set(coin_id, (timestamp, values))
+                return last[1] if last is not None else None
+        with self._lock:
+            last = self._last.get(coin_id)
+            if last is not None and timestamp <= last[0]:
+                return None
+            self._last[coin_id] = (timestamp, values)
+            self._last.move_to_end(coin_id)
+            while len(self._last) > self.coins:
+                self._last.popitem(last=False)
+            return last[1] if last is not None else None
+
+    def _fire(self, key, lo, hi, timestamp, previous, current):
+        if lo >= hi:
+            return []
+        coin_id, alert_type, condition = key
+        return [
+            {
+                "alert_id": alert_id,
+                "coin_id": coin_id,
+                "alert_type": alert_type,
+                "condition": condition,
+                "threshold": threshold,
+                "previous_value": previous,
+                "current_value": current,
+                "timestamp": timestamp,
+            }
+            for threshold, alert_id in zip(self._thresholds[key][lo:hi], self._ids[key][lo:hi])
+        ]
+
+    def fired_since(self, timestamp=None, coin_id=None):
+        if self.shared is not None:
+            recent = self.shared.recent.items()
+        else:
+            with self._lock:
+                recent = list(self.recent)
+        return [
+            event for event in recent
+            if (timestamp is None or event["timestamp"] > timestamp)
+            and (coin_id is None or event["coin_id"] == coin_id)
+        ]
+
+    def __len__(self):
+        return len(self._alerts)
+
+
+# Created in the master before the workers fork (see app.configure_workers).
+# `lock` makes reading and replacing a coin's last point one step across all
+# workers, so a crossing fires once no matter which worker sees it first.
+class SharedAlertState:
+    def __init__(self, history=500, coins=1024):
+        self.lock = multiprocessing.Lock()
+        self.last = SharedCache(slots=coins, slot_size=512)
+        self.recent = SharedRing(history, slot_size=1024)
+        self._version = multiprocessing.Value("q", 0)
+
+    @property
+    def version(self):
+        return self._version.value
+
+    # returns the version before the bump
+    def bump(self):
+        with self._version.get_lock():
+            self._version.value += 1
+            return self._version.value - 1
@@ -1,18 +1,33 @@
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, g, render_template, jsonify, request, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Engine
+from market_data import MarketDataClient, UpstreamError
+from alerts import ALERT_CONDITIONS, ALERT_TYPES, AlertEngine, SharedAlertState
+from streaming import StreamHub
+from indicators import IndicatorState
+from metrics import MetricsBoard, render_prometheus
+from shared_cache import SharedCache
+from exporters import EXPORT_FORMATS, EXPORT_OPTIONS, WRITERS, ExportChunk, gzip_stream, stream_npz
 from datetime import datetime, timedelta
-import json
+from collections import OrderedDict
+import numpy as np
 import math
-import random
-import requests
+import sqlite3
+import threading
+import time
+import zlib
 import csv
+import gzip
+import hashlib
 import io
+import itertools
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///sentiment.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///sentiment.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
@@ -29,7 +44,21 @@ class Alert(db.Model):
     enabled = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "coin_id": self.coin_id,
+            "coin_name": self.coin_name,
+            "alert_type": self.alert_type,
+            "condition": self.condition,
+            "threshold": self.threshold,
+            "enabled": self.enabled,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
 class SentimentData(db.Model):
+    __table_args__ = (db.Index('ix_sentiment_data_coin_timestamp', 'coin_id', 'timestamp', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     coin_id = db.Column(db.String(50), nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False)
@@ -46,9 +75,12 @@ class SentimentData(db.Model):
     trading_volume_24h = db.Column(db.BigInteger, nullable=False)
     price_momentum = db.Column(db.Float, nullable=False)
     volatility_index = db.Column(db.Float, nullable=False)
-    technical_indicators = db.Column(db.Text, nullable=False)
-    market_context = db.Column(db.Text, nullable=False)
-    sources = db.Column(db.Text, nullable=False)
+    rsi = db.Column(db.Float, nullable=False)
+    macd = db.Column(db.Float, nullable=False)
+    btc_dominance = db.Column(db.Float, nullable=False)
+    market_phase = db.Column(db.String(10), nullable=False)
+    twitter = db.Column(db.Float, nullable=False)
+    reddit = db.Column(db.Float, nullable=False)
 
 # === API ===
 class SentimentAPI:
@@ -60,6 +92,8 @@ class SentimentAPI:
         {"id": "cardano", "name": "Cardano", "symbol": "ADA"},
     ]
 
+    TIME_RANGES = ("1h", "6h", "1d", "1w")
+
     @staticmethod
     def get_intervals(time_range):
         return {
@@ -71,55 +105,514 @@ class SentimentAPI:
 
     @staticmethod
     def generate_realistic_sentiment(coin_id, time_range, current_price=None, price_change_24h=None):
+        return SentimentAPI.generate_batch([coin_id], [time_range])[coin_id][time_range]
+
+    @staticmethod
+    def generate_points(coin_ids, time_range, now=None, columnar=False):
+        series = SentimentSeries.generate(coin_ids, time_range, now)
+        convert = series.to_columns if columnar else series.to_points
+        return {coin_id: convert(row) for row, coin_id in enumerate(series.coin_ids)}
+
+    # columnar=True returns {"timestamp": [...], "<field>": [...]} per coin
+    # instead of a list of point objects
+    @staticmethod
+    def generate_batch(coin_ids, time_ranges, now=None, loader=None, columnar=False):
+        loader = loader or SentimentAPI.generate_points
+        now = time.time() if now is None else now
+        coin_ids = list(dict.fromkeys(coin_ids))
+        result = {coin_id: {} for coin_id in coin_ids}
+
+        for time_range in time_ranges:
+            bucket = int(now // SentimentAPI.get_intervals(time_range)["duration"])
+            missing = []
+            for coin_id in coin_ids:
+                cached = series_cache.get((coin_id, time_range, bucket, columnar))
+                if cached is None:
+                    missing.append(coin_id)
+                else:
+                    result[coin_id][time_range] = cached
+
+            if missing:
+                for coin_id, points in loader(missing, time_range, now, columnar).items():
+                    series_cache.set((coin_id, time_range, bucket, columnar), points)
+                    result[coin_id][time_range] = points
+
+        return result
+
+    # oldest point first, one coin and at most chunk_size points at a time
+    @staticmethod
+    def iter_export_chunks(coin_ids, time_range, count, now=None, chunk_size=10000):
+        duration = SentimentAPI.get_intervals(time_range)["duration"]
+        last = int((time.time() if now is None else now) // duration) * duration
+        for coin_id in coin_ids:
+            for start in range(0, count, chunk_size):
+                size = min(chunk_size, count - start)
+                series = SentimentSeries.generate([coin_id], time_range, last - (count - start - size) * duration, size)
+                columns = {name: values[0][::-1] for name, values in series.columns.items()}
+                columns["market_phase"] = np.full(size, "bull")
+                yield ExportChunk(coin_id, series.timestamps[::-1], columns)
+
+# === SENTIMENT ENGINE ===
+# Points are derived from a counter-based hash of (coin, bucket start), so any
+# point is reproducible on its own: the same hour looks the same in "1d" and
+# "1w", and repeated requests inside one interval return identical series.
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_UNIT_SCALE = 2.0 ** -53
+
+SERIES_FIELDS = (
+    "overall", "positive_noise", "negative_noise", "confidence", "volume_correlation",
+    "social_mentions", "news_sentiment", "fear_greed_index", "market_cap_influence",
+    "trading_volume_24h", "price_momentum", "volatility_index", "rsi", "macd",
+    "btc_dominance", "twitter", "reddit",
+)
+
+
+def _splitmix64(x):
+    z = x + _GOLDEN_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+def _round(values, digits):
+    # + 0.0 turns -0.0 into 0.0, which is what sqlite hands back anyway
+    return np.round(values, digits) + 0.0
+
+
+def _coin_seed(coin_id):
+    # crc32 instead of hash(): it has to match across processes and restarts
+    return zlib.crc32(coin_id.encode("utf-8"))
+
+
+# columnar coin x interval grid, newest interval first
+class SentimentSeries:
+    def __init__(self, coin_ids, timestamps, columns):
+        self.coin_ids = list(coin_ids)
+        self.timestamps = timestamps
+        self.columns = columns
+
+    @classmethod
+    def generate(cls, coin_ids, time_range, now=None, count=None):
         intervals = SentimentAPI.get_intervals(time_range)
-        now = datetime.utcnow()
-        data = []
+        duration = intervals["duration"]
+        now = time.time() if now is None else now
+        last_bucket = int(now // duration)
+
+        buckets = last_bucket - np.arange(count or intervals["count"], dtype=np.int64)
+        timestamps = buckets * duration
+        seeds = np.array([_coin_seed(c) for c in coin_ids], dtype=np.uint64)
+        base = _splitmix64((seeds[:, None] << np.uint64(32)) ^ timestamps.astype(np.uint64)[None, :])
+
+        streams = _splitmix64(
+            base[None, :, :] + np.arange(1, len(SERIES_FIELDS) + 1, dtype=np.uint64)[:, None, None] * _GOLDEN_GAMMA
+        )
+        u = dict(zip(SERIES_FIELDS, (streams >> np.uint64(11)).astype(np.float64) * _UNIT_SCALE))
 
-        profile = {
-            "base_positive": 50,
-            "base_negative": 30,
-            "volatility": 1.0
+        def uniform(name, low, high):
+            return low + (high - low) * u[name]
+
+        def randint(name, low, high):
+            return (low + np.floor(u[name] * (high - low + 1))).astype(np.int64)
+
+        overall = uniform("overall", -20, 20)
+        positive = np.clip(50 + overall + uniform("positive_noise", -10, 10), 0, 100)
+        negative = np.clip(50 - overall + uniform("negative_noise", -10, 10), 0, 100)
+        neutral = np.maximum(0, 100 - positive - negative)
+
+        columns = {
+            "positive": _round(positive, 2),
+            "negative": _round(negative, 2),
+            "neutral": _round(neutral, 2),
+            "overall": _round(overall, 2),
+            "confidence": _round(uniform("confidence", 0.5, 1.0), 2),
+            "volume_correlation": _round(uniform("volume_correlation", 0.1, 1.0), 2),
+            "social_mentions": randint("social_mentions", 100, 10000),
+            "news_sentiment": _round(uniform("news_sentiment", -1, 1), 2),
+            "fear_greed_index": _round(uniform("fear_greed_index", 0, 100), 1),
+            "market_cap_influence": _round(uniform("market_cap_influence", 0.1, 1.0), 2),
+            "trading_volume_24h": randint("trading_volume_24h", 1000000, 100000000),
+            "price_momentum": _round(uniform("price_momentum", -10, 10), 2),
+            "volatility_index": _round(uniform("volatility_index", 0.1, 2.0), 2),
+            "rsi": _round(uniform("rsi", 0, 100), 2),
+            "macd": _round(uniform("macd", -2, 2), 2),
+            "btc_dominance": _round(uniform("btc_dominance", 30, 70), 2),
+            "twitter": _round(uniform("twitter", 0, 100), 2),
+            "reddit": _round(uniform("reddit", 0, 100), 2),
         }
+        return cls(coin_ids, timestamps, columns)
+
+    def to_columns(self, row):
+        c = {"timestamp": np.datetime_as_string(self.timestamps.astype("datetime64[s]")).tolist()}
+        for name in STORE_COLUMNS:
+            c[name] = ["bull"] * len(self.timestamps) if name == "market_phase" else self.columns[name][row].tolist()
+        return c
+
+    def to_points(self, row):
+        c = self.to_columns(row)
+        return build_points(c["timestamp"], c)
+
+
+# one zip over per-column lists: no per-point numpy access and no json.dumps
+# (repr() of a float is exactly what json emits)
+def build_points(timestamps, c):
+    return [
+        {
+            "timestamp": ts,
+            "positive": pos,
+            "negative": neg,
+            "neutral": neu,
+            "overall": ovr,
+            "confidence": conf,
+            "volume_correlation": vcorr,
+            "social_mentions": mentions,
+            "news_sentiment": news,
+            "fear_greed_index": fgi,
+            "market_cap_influence": mci,
+            "trading_volume_24h": volume,
+            "price_momentum": momentum,
+            "volatility_index": vol,
+            "technical_indicators": '{"rsi": %r, "macd": %r}' % (rsi, macd),
+            "market_context": '{"btc_dominance": %r, "market_phase": "%s"}' % (btc, phase),
+            "sources": '{"twitter": %r, "reddit": %r}' % (tw, rd),
+        }
+        for ts, pos, neg, neu, ovr, conf, vcorr, mentions, news, fgi, mci, volume, momentum, vol,
+            rsi, macd, btc, phase, tw, rd in zip(
+            timestamps, c["positive"], c["negative"], c["neutral"], c["overall"], c["confidence"],
+            c["volume_correlation"], c["social_mentions"], c["news_sentiment"], c["fear_greed_index"],
+            c["market_cap_influence"], c["trading_volume_24h"], c["price_momentum"], c["volatility_index"],
+            c["rsi"], c["macd"], c["btc_dominance"], c["market_phase"], c["twitter"], c["reddit"],
+        )
+    ]
+
+
+# Process-local LRU. With `shared` (a SharedCache, set by configure_workers)
+# a local miss falls through to the cache all workers share, and every set is
+# published there too.
+class SeriesCache:
+    def __init__(self, maxsize=256, shared=None):
+        self.maxsize = maxsize
+        self.shared = shared
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+            self._misses += 1
+        if self.shared is not None:
+            cached = self.shared.get(key)
+            if cached is not None:
+                self._store(key, cached[0])
+                return cached[0]
+        return None
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    # local counters are this worker's only
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "maxsize": self.maxsize, "hits": self._hits, "misses": self._misses}
+
+
+series_cache = SeriesCache()
+response_cache = SeriesCache()
+
+SENTIMENT_FORMATS = ("points", "columnar")
+
+# every coin in a batch is generated, stored and evaluated for alerts
+MAX_BATCH_COINS = 25
+
+# === STORE ===
+_EPOCH = datetime(1970, 1, 1)
+
+STORE_COLUMNS = (
+    "positive", "negative", "neutral", "overall", "confidence", "volume_correlation",
+    "social_mentions", "news_sentiment", "fear_greed_index", "market_cap_influence",
+    "trading_volume_24h", "price_momentum", "volatility_index", "rsi", "macd",
+    "btc_dominance", "market_phase", "twitter", "reddit",
+)
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def init_db():
+    table = SentimentData.__table__
+    inspector = inspect(db.engine)
+    if inspector.has_table(table.name):
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        if "technical_indicators" in columns:
+            # legacy JSON-in-Text layout, which was never written to: rebuild it
+            table.drop(db.engine)
+    db.create_all()
+
+
+# Only coin_ids are persisted (None: every coin). Any other id is generated
+# on demand and never written, so the table is bounded by retention times
+# the known coins, not by what clients ask for.
+class SentimentStore:
+    def __init__(self, engine=None, batch_size=5000, retention_days=30, prune_interval=3600, coin_ids=None):
+        self._engine = engine
+        self.coin_ids = frozenset(coin_ids) if coin_ids is not None else None
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self.table = SentimentData.__table__
+        self._insert_sql = "INSERT OR IGNORE INTO %s (coin_id, timestamp, %s) VALUES (%s)" % (
+            self.table.name, ", ".join(STORE_COLUMNS), ", ".join("?" * (len(STORE_COLUMNS) + 2))
+        )
+
+    @property
+    def engine(self):
+        return self._engine if self._engine is not None else db.engine
+
+    def ingest(self, series):
+        # raw executemany of positional tuples: building SQLAlchemy params per
+        # row costs more than the insert itself. Timestamps are written in the
+        # same text format SQLAlchemy's sqlite DateTime uses.
+        timestamps = np.char.replace(
+            np.datetime_as_string(series.timestamps.astype("datetime64[s]"), unit="us"), "T", " "
+        ).tolist()
+        phases = ["bull"] * len(timestamps)
+
+        inserted = 0
+        with self.engine.begin() as conn:
+            for row, coin_id in enumerate(series.coin_ids):
+                columns = [
+                    phases if name == "market_phase" else series.columns[name][row].tolist()
+                    for name in STORE_COLUMNS
+                ]
+                rows = list(zip(itertools.repeat(coin_id), timestamps, *columns))
+                for start in range(0, len(rows), self.batch_size):
+                    inserted += conn.exec_driver_sql(self._insert_sql, rows[start:start + self.batch_size]).rowcount
+
+        if time.time() - self._last_prune > self.prune_interval:
+            self.prune()
+        return inserted
+
+    # loader for SentimentAPI.generate_batch: read the exact buckets of the
+    # range by index seeks, and generate + ingest only coins that have gaps
+    def load(self, coin_ids, time_range, now=None, columnar=False):
+        stored = [coin_id for coin_id in coin_ids if self.coin_ids is None or coin_id in self.coin_ids]
+        now = time.time() if now is None else now
+        intervals = SentimentAPI.get_intervals(time_range)
+        duration = intervals["duration"]
+        last = int(now // duration) * duration
+        timestamps = [_EPOCH + timedelta(seconds=last - i * duration) for i in range(intervals["count"])]
+
+        t = self.table
+        query = (
+            select(t.c.coin_id, t.c.timestamp, *(t.c[name] for name in STORE_COLUMNS))
+            .where(t.c.coin_id.in_(stored), t.c.timestamp.in_(timestamps))
+            .order_by(t.c.coin_id, t.c.timestamp.desc())
+        )
+        rows_by_coin = {coin_id: [] for coin_id in stored}
+        if stored:
+            with self.engine.connect() as conn:
+                for row in conn.execute(query):
+                    rows_by_coin[row[0]].append(row)
+
+        result = {}
+        gaps = [coin_id for coin_id, rows in rows_by_coin.items() if len(rows) < len(timestamps)]
+        for coin_id, rows in rows_by_coin.items():
+            if coin_id not in gaps:
+                c = self._to_columns(rows)
+                result[coin_id] = c if columnar else build_points(c["timestamp"], c)
+
+        unstored = [coin_id for coin_id in coin_ids if coin_id not in rows_by_coin]
+        for missing, persist in ((gaps, True), (unstored, False)):
+            if not missing:
+                continue
+            series = SentimentSeries.generate(missing, time_range, now)
+            if persist:
+                self.ingest(series)
+            convert = series.to_columns if columnar else series.to_points
+            for row, coin_id in enumerate(series.coin_ids):
+                result[coin_id] = convert(row)
+        return result
+
+    def query_range(self, coin_id, start, end):
+        t = self.table
+        query = (
+            select(t.c.coin_id, t.c.timestamp, *(t.c[name] for name in STORE_COLUMNS))
+            .where(t.c.coin_id == coin_id, t.c.timestamp >= start, t.c.timestamp <= end)
+            .order_by(t.c.timestamp.desc())
+        )
+        with self.engine.connect() as conn:
+            c = self._to_columns(conn.execute(query).all())
+        return build_points(c["timestamp"], c)
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        self._last_prune = now
+        cutoff = _EPOCH + timedelta(seconds=now - self.retention_days * 86400)
+        t = self.table
+        with self.engine.begin() as conn:
+            coin_ids = conn.execute(select(t.c.coin_id).distinct()).scalars().all()
+            # per coin, so each delete is a range on the (coin_id, timestamp) index
+            return sum(
+                conn.execute(t.delete().where(t.c.coin_id == coin_id, t.c.timestamp < cutoff)).rowcount
+                for coin_id in coin_ids
+            )
+
+    @staticmethod
+    def _to_columns(rows):
+        columns = list(zip(*rows)) or [()] * (len(STORE_COLUMNS) + 2)
+        c = {"timestamp": [ts.isoformat() for ts in columns[1]]}
+        c.update((name, list(values)) for name, values in zip(STORE_COLUMNS, columns[2:]))
+        return c
+
 
-        for i in range(intervals["count"]):
-            timestamp = now - timedelta(seconds=i * intervals["duration"])
-            overall = random.uniform(-20, 20)
-            positive = max(0, min(100, 50 + overall + random.uniform(-10, 10)))
-            negative = max(0, min(100, 50 - overall + random.uniform(-10, 10)))
-            neutral = max(0, 100 - positive - negative)
-
-            data_point = {
-                "timestamp": timestamp.isoformat(),
-                "positive": round(positive, 2),
-                "negative": round(negative, 2),
-                "neutral": round(neutral, 2),
-                "overall": round(overall, 2),
-                "confidence": round(random.uniform(0.5, 1.0), 2),
-                "volume_correlation": round(random.uniform(0.1, 1.0), 2),
-                "social_mentions": random.randint(100, 10000),
-                "news_sentiment": round(random.uniform(-1, 1), 2),
-                "fear_greed_index": round(random.uniform(0, 100), 1),
-                "market_cap_influence": round(random.uniform(0.1, 1.0), 2),
-                "trading_volume_24h": random.randint(1000000, 100000000),
-                "price_momentum": round(random.uniform(-10, 10), 2),
-                "volatility_index": round(random.uniform(0.1, 2.0), 2),
-                "technical_indicators": json.dumps({
-                    "rsi": round(random.uniform(0, 100), 2),
-                    "macd": round(random.uniform(-2, 2), 2)
-                }),
-                "market_context": json.dumps({
-                    "btc_dominance": round(random.uniform(30, 70), 2),
-                    "market_phase": "bull"
-                }),
-                "sources": json.dumps({
-                    "twitter": round(random.uniform(0, 100), 2),
-                    "reddit": round(random.uniform(0, 100), 2),
-                })
-            }
-
-            data.append(data_point)
-
-        return data
+sentiment_store = SentimentStore(
+    retention_days=int(os.environ.get("SENTIMENT_RETENTION_DAYS", 30)),
+    coin_ids=[coin["id"] for coin in SentimentAPI.POPULAR_COINS],
+)
+
+MAX_EXPORT_DAYS = 366
+
+# === ALERTS ===
+# alerts are evaluated against minute points, the finest resolution we serve
+ALERT_TIME_RANGE = "1h"
+
+alert_engine = AlertEngine()
+
+
+# rebuilds the index on first use, and after another worker changed an alert
+def ensure_alert_index():
+    if alert_engine.stale():
+        version = alert_engine.shared_version()
+        alert_engine.rebuild([alert.to_dict() for alert in Alert.query.all()], version)
+
+
+def latest_point(coin_id, now=None):
+    series = SentimentSeries.generate([coin_id], ALERT_TIME_RANGE, now, count=1)
+    return int(series.timestamps[0]), series.to_points(0)[0]
+
+
+def evaluate_alerts(coin_id, now=None, point=None):
+    ensure_alert_index()
+    if point is None:
+        point = latest_point(coin_id, now)[1]
+    return alert_engine.evaluate(coin_id, point["timestamp"], {t: point[t] for t in ALERT_TYPES})
+
+# === INDICATORS ===
+# Rolling indicator state per coin, fed with minute points. A coin is cold
+# started from INDICATOR_HISTORY minutes in one vectorized backfill; after that
+# only the minutes since the last update are applied, one O(1) step each.
+INDICATOR_HISTORY = 2 * 24 * 60
+
+INDICATOR_COINS = frozenset(coin["id"] for coin in SentimentAPI.POPULAR_COINS)
+
+indicator_states = {}
+_indicator_lock = threading.Lock()
+
+
+def _minute_columns(coin_id, now, count):
+    series = SentimentSeries.generate([coin_id], ALERT_TIME_RANGE, now, count=count)
+    # generate() is newest first; indicators want oldest first
+    return (series.timestamps[::-1], series.columns["overall"][0][::-1],
+            series.columns["trading_volume_24h"][0][::-1].astype(np.float64))
+
+
+def indicator_state(coin_id, now=None):
+    now = time.time() if now is None else now
+    minute = int(now // 60) * 60
+    with _indicator_lock:
+        state = indicator_states.get(coin_id)
+        if state is None or minute - state.last_timestamp > INDICATOR_HISTORY * 60:
+            state = indicator_states[coin_id] = IndicatorState()
+            state.backfill(*_minute_columns(coin_id, now, INDICATOR_HISTORY))
+            return state
+
+        gap = (minute - state.last_timestamp) // 60
+        if gap > 0:
+            for timestamp, overall, volume in zip(*(c.tolist() for c in _minute_columns(coin_id, now, gap))):
+                state.update(timestamp, overall, volume)
+        return state
+
+
+def _iso(timestamp):
+    return (_EPOCH + timedelta(seconds=timestamp)).isoformat() if timestamp is not None else None
+
+# === LIVE STREAM ===
+def produce_stream_events(coin_id):
+    now = time.time()
+    timestamp, point = latest_point(coin_id, now)
+    # catches up every minute since the last tick, not just the newest one
+    if coin_id in indicator_states:
+        indicator_state(coin_id, now)
+    with app.app_context():
+        evaluate_alerts(coin_id, point=point)
+    # whichever worker evaluated this point first fired its alerts; every
+    # worker's subscribers get them from the shared history
+    fired = [event for event in alert_engine.fired_since(coin_id=coin_id) if event["timestamp"] == point["timestamp"]]
+    return timestamp, [("point", point)] + [("alert", event) for event in fired]
+
+
+stream_hub = StreamHub(produce_stream_events, interval=float(os.environ.get("STREAM_INTERVAL", 1.0)))
+
+market_data = MarketDataClient(bulk_ids=[coin["id"] for coin in SentimentAPI.POPULAR_COINS])
+
+# === METRICS ===
+# metrics_board is created below, once every route is registered
+@app.before_request
+def _metrics_start():
+    g.metrics_start = time.perf_counter()
+    metrics_board.started()
+
+@app.after_request
+def _metrics_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def _metrics_finish(exc):
+    if "metrics_start" not in g:
+        return
+    route = request.url_rule.rule if request.url_rule else None
+    status = 500 if exc is not None else g.get("metrics_status", 500)
+    metrics_board.finished(route, (time.perf_counter() - g.metrics_start) * 1000, status)
+
+# only numbers that cover every worker: the local LRUs' counters belong to
+# whichever worker answers, so they are left out once there are several
+def cache_stats():
+    stats = {"market": market_data.cache.stats()}
+    if metrics_board.workers == 1:
+        stats.update(series=series_cache.stats(), response=response_cache.stats())
+    if series_cache.shared is not None:
+        stats["shared_series"] = series_cache.shared.stats()
+    return stats
 
 # === ROUTES ===
 @app.route('/')
@@ -133,39 +626,314 @@ def get_coins():
 @app.route('/api/coin/<coin_id>')
 def get_coin_data(coin_id):
     try:
-        response = requests.get(
-            f"https://api.coingecko.com/api/v3/coins/markets",
-            params={"vs_currency": "usd", "ids": coin_id}
-        )
-
-        if response.status_code != 200:
-            return jsonify({"error": "Erro na API CoinGecko"}), 502
-
-        data = response.json()
+        data = market_data.get_coin(coin_id)
         if data:
-            return jsonify(data[0])
+            return jsonify(data)
         return jsonify({"error": "Coin not found"}), 404
+    except UpstreamError as e:
+        return jsonify({"error": str(e)}), 502
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/market/stats')
+def get_market_stats():
+    return jsonify(market_data.stats())
+
+# A series only changes when a new bucket starts, so (coin, range, bucket,
+# format, encoding) identifies the exact bytes: that is the strong ETag, and a
+# matching If-None-Match is answered with 304 before any data is loaded.
+def _sentiment_body(coin_id, time_range, now, columnar):
+    data = SentimentAPI.generate_batch([coin_id], [time_range], now, loader=sentiment_store.load, columnar=columnar)
+    series = data[coin_id][time_range]
+    if columnar:
+        series = {"coin_id": coin_id, "time_range": time_range, "count": len(series["timestamp"]), "columns": series}
+    return (app.json.dumps(series) + "\n").encode("utf-8")
+
 @app.route('/api/sentiment/<coin_id>')
 def get_sentiment_data(coin_id):
     time_range = request.args.get('timeRange', '1d')
     current_price = request.args.get('currentPrice', type=float)
     price_change_24h = request.args.get('priceChange24h', type=float)
+    response_format = request.args.get('format', 'points')
+    if response_format not in SENTIMENT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(SENTIMENT_FORMATS)}"}), 400
     try:
-        data = SentimentAPI.generate_realistic_sentiment(coin_id, time_range, current_price, price_change_24h)
+        evaluate_alerts(coin_id)
+        now = time.time()
+        bucket = int(now // SentimentAPI.get_intervals(time_range)["duration"])
+        encoding = "gzip" if request.accept_encodings["gzip"] else "identity"
+        key = (coin_id, time_range, bucket, response_format, encoding)
+        etag = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        body = response_cache.get(key)
+        if body is None:
+            body = _sentiment_body(coin_id, time_range, now, response_format == "columnar")
+            if encoding == "gzip":
+                body = gzip.compress(body, compresslevel=6)
+            response_cache.set(key, body)
+
+        if encoding == "gzip":
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, mimetype="application/json", headers=headers)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sentiment/batch')
+def get_sentiment_batch():
+    default_coins = ",".join(coin["id"] for coin in SentimentAPI.POPULAR_COINS)
+    coin_ids = list(dict.fromkeys(c for c in request.args.get('coins', default_coins).split(',') if c))
+    time_ranges = list(dict.fromkeys(t for t in request.args.get('timeRanges', '1d').split(',') if t))
+    if not coin_ids or not time_ranges:
+        return jsonify({"error": "coins and timeRanges must not be empty"}), 400
+    if len(coin_ids) > MAX_BATCH_COINS:
+        return jsonify({"error": f"at most {MAX_BATCH_COINS} coins per batch"}), 400
+    unknown = [t for t in time_ranges if t not in SentimentAPI.TIME_RANGES]
+    if unknown:
+        return jsonify({"error": f"timeRanges must be among {', '.join(SentimentAPI.TIME_RANGES)}"}), 400
+    response_format = request.args.get('format', 'points')
+    if response_format not in SENTIMENT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(SENTIMENT_FORMATS)}"}), 400
+    columnar = response_format == 'columnar'
+    try:
+        data = SentimentAPI.generate_batch(coin_ids, time_ranges, loader=sentiment_store.load, columnar=columnar)
+        for coin_id in data:
+            evaluate_alerts(coin_id)
         return jsonify(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# the TS dashboard sends camelCase keys
+_ALERT_FIELD_ALIASES = {"coinId": "coin_id", "coinName": "coin_name", "type": "alert_type"}
+
+
+def _alert_payload(partial=False):
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ValueError("JSON body required")
+    data = {_ALERT_FIELD_ALIASES.get(key, key): value for key, value in payload.items()}
+    fields = {}
+
+    for name in ("coin_id", "coin_name"):
+        if name in data:
+            fields[name] = str(data[name])
+    if "alert_type" in data:
+        if data["alert_type"] not in ALERT_TYPES:
+            raise ValueError(f"alert_type must be one of {', '.join(ALERT_TYPES)}")
+        fields["alert_type"] = data["alert_type"]
+    if "condition" in data:
+        if data["condition"] not in ALERT_CONDITIONS:
+            raise ValueError(f"condition must be one of {', '.join(ALERT_CONDITIONS)}")
+        fields["condition"] = data["condition"]
+    if "threshold" in data:
+        try:
+            fields["threshold"] = float(data["threshold"])
+        except (TypeError, ValueError):
+            raise ValueError("threshold must be a number")
+        # NaN would break the sorted threshold lists the engine bisects
+        if not math.isfinite(fields["threshold"]):
+            raise ValueError("threshold must be a finite number")
+    if "enabled" in data:
+        if not isinstance(data["enabled"], bool):
+            raise ValueError("enabled must be true or false")
+        fields["enabled"] = data["enabled"]
+
+    if not partial:
+        missing = [name for name in ("coin_id", "alert_type", "condition", "threshold") if name not in fields]
+        if missing:
+            raise ValueError(f"missing fields: {', '.join(missing)}")
+        fields.setdefault("coin_name", fields["coin_id"])
+    return fields
+
+@app.route('/api/alerts', methods=['GET'])
+def list_alerts():
+    query = Alert.query
+    coin_id = request.args.get('coinId')
+    if coin_id:
+        query = query.filter_by(coin_id=coin_id)
+    return jsonify([alert.to_dict() for alert in query.order_by(Alert.id).all()])
+
+@app.route('/api/alerts', methods=['POST'])
+def create_alert():
+    try:
+        alert = Alert(**_alert_payload())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.add(alert)
+    db.session.commit()
+    ensure_alert_index()
+    alert_engine.add(alert.to_dict())
+    alert_engine.changed()
+    return jsonify(alert.to_dict()), 201
+
+@app.route('/api/alerts/<int:alert_id>', methods=['PUT'])
+def update_alert(alert_id):
+    alert = db.session.get(Alert, alert_id)
+    if alert is None:
+        return jsonify({"error": "Alert not found"}), 404
+    try:
+        fields = _alert_payload(partial=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    for name, value in fields.items():
+        setattr(alert, name, value)
+    db.session.commit()
+    ensure_alert_index()
+    alert_engine.add(alert.to_dict())
+    alert_engine.changed()
+    return jsonify(alert.to_dict())
+
+@app.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
+def delete_alert(alert_id):
+    alert = db.session.get(Alert, alert_id)
+    if alert is None:
+        return jsonify({"error": "Alert not found"}), 404
+    db.session.delete(alert)
+    db.session.commit()
+    ensure_alert_index()
+    alert_engine.remove(alert_id)
+    alert_engine.changed()
+    return '', 204
+
+@app.route('/api/alerts/fired')
+def list_fired_alerts():
+    return jsonify(alert_engine.fired_since(request.args.get('since'), request.args.get('coinId')))
+
+def _flag(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ('0', 'false', 'no', 'off')
+
+@app.route('/api/export/<coin_id>')
+def export_sentiment_data(coin_id):
+    time_range = request.args.get('timeRange', '1d')
+    export_format = request.args.get('format', 'csv')
+    days = request.args.get('days', type=float)
+    compress = _flag('gzip', False)
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Formato de exportação inválido: {export_format}"}), 400
+
+    if days is not None and not (math.isfinite(days) and 0 < days <= MAX_EXPORT_DAYS):
+        return jsonify({"error": f"days must be between 0 and {MAX_EXPORT_DAYS}"}), 400
+    intervals = SentimentAPI.get_intervals(time_range)
+    count = intervals["count"] if days is None else int(days * 86400 // intervals["duration"])
+    if count <= 0:
+        return jsonify({"error": f"days is shorter than one point of timeRange {time_range}"}), 400
+
+    coin_names = {coin["id"]: coin["name"] for coin in SentimentAPI.POPULAR_COINS}
+    coin_ids = list(coin_names) if coin_id == 'all' else [coin_id]
+    options = {name: _flag(name, True) for name in EXPORT_OPTIONS}
+    now = time.time()
+    metadata = {
+        "dataset_name": coin_names.get(coin_id, coin_id),
+        "coin_ids": coin_ids,
+        "coin_names": {c: coin_names.get(c, c) for c in coin_ids},
+        "time_range": time_range,
+        "current_price": request.args.get('currentPrice', type=float),
+        "export_timestamp": datetime.utcnow().isoformat(),
+        "samples": count * len(coin_ids),
+    }
+
+    chunks = SentimentAPI.iter_export_chunks(coin_ids, time_range, count, now)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'npz':
+        body = stream_npz(chunks, options, metadata, compress=compress)
+    else:
+        body = WRITERS[export_format](chunks, options, metadata)
+        if compress:
+            body = gzip_stream(body)
+            mimetype, extension = "application/gzip", extension + ".gz"
+
+    filename = f"{coin_id}_sentiment_{time_range}_{datetime.utcnow():%Y-%m-%d}.{extension}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.route('/api/summary/<coin_id>')
+def get_summary(coin_id):
+    # every state costs a backfill and stays for the life of the process
+    if coin_id not in INDICATOR_COINS:
+        return jsonify({"error": "Coin not found"}), 404
+    try:
+        summary = indicator_state(coin_id).summary()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    summary["timestamp"] = _iso(summary["timestamp"])
+    for buckets in summary["rollups"].values():
+        for bucket in buckets:
+            bucket["timestamp"] = _iso(bucket["timestamp"])
+    return jsonify(dict(summary, coin_id=coin_id))
+
+@app.route('/api/stream/<coin_id>')
+def stream_sentiment(coin_id):
+    duration = SentimentAPI.get_intervals(request.args.get('timeRange', '1h'))["duration"]
+    subscriber = stream_hub.subscribe(coin_id, duration)
+
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            yield from subscriber.iter_messages()
+        finally:
+            stream_hub.unsubscribe(subscriber)
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.route('/api/stream/stats')
+def get_stream_stats():
+    return jsonify(stream_hub.stats())
+
+@app.route('/metrics')
+def get_metrics():
+    snapshot = metrics_board.snapshot()
+    if request.args.get('format') == 'prometheus':
+        return Response(render_prometheus(snapshot, cache_stats()), mimetype="text/plain; version=0.0.4")
+    return jsonify(dict(snapshot, caches=cache_stats(), worker=metrics_board.worker))
+
 # === SPA (REACT) 404 FALLBACK ===
 @app.errorhandler(404)
 def not_found(e):
     return render_template("index.html")
 
+metrics_board = MetricsBoard([rule.rule for rule in app.url_map.iter_rules()])
+
+# === WORKERS ===
+# Called by serve.py in the master, after the app is imported and before it
+# forks: the metrics board and the shared caches are mmaps, so they have to
+# exist before the workers do to be shared by them.
+def configure_workers(workers):
+    global metrics_board
+    metrics_board = MetricsBoard(metrics_board.routes, workers)
+    market_data.cache = SharedCache(
+        slots=int(os.environ.get("SHARED_MARKET_SLOTS", 1024)), slot_size=4096,
+        ttl=market_data.cache.ttl, stale_ttl=market_data.cache.stale_ttl,
+    )
+    shared = SharedCache(
+        slots=int(os.environ.get("SHARED_SERIES_SLOTS", 512)),
+        slot_size=int(os.environ.get("SHARED_SERIES_SLOT_KB", 128)) * 1024,
+    )
+    series_cache.shared = shared
+    response_cache.shared = shared
+    alert_engine.shared = SharedAlertState(history=alert_engine.recent.maxlen, coins=alert_engine.coins)
+
+# Called in each worker right after the fork: connections opened by the
+# master must not be shared between processes.
+def worker_started(index):
+    metrics_board.attach(index)
+    with app.app_context():
+        db.engine.dispose(close=False)
+    market_data.session.close()
+
 # === INIT ===
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
     app.run(debug=True, host="0.0.0.0", port=5000)
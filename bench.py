@@ -0,0 +1,542 @@
+import argparse
+import atexit
+import gzip
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from sqlalchemy import create_engine
+
+# routes run against a throwaway database unless DATABASE_URL is set
+_BENCH_DIR = tempfile.mkdtemp(prefix="sentiment-bench-")
+atexit.register(shutil.rmtree, _BENCH_DIR, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_BENCH_DIR, 'bench.db')}")
+
+import app as app_module
+from indicators import IndicatorState
+from alerts import ALERT_CONDITIONS, ALERT_TYPES, AlertEngine
+from app import app, SentimentAPI, SentimentData, SentimentSeries, SentimentStore, series_cache
+
+TIME_RANGES = ("1h", "6h", "1d", "1w")
+
+
+# the original per-point loop, kept as the baseline the engine is measured against
+def legacy_generate(coin_id, time_range):
+    intervals = SentimentAPI.get_intervals(time_range)
+    now = datetime.utcnow()
+    data = []
+    for i in range(intervals["count"]):
+        timestamp = now - timedelta(seconds=i * intervals["duration"])
+        overall = random.uniform(-20, 20)
+        positive = max(0, min(100, 50 + overall + random.uniform(-10, 10)))
+        negative = max(0, min(100, 50 - overall + random.uniform(-10, 10)))
+        neutral = max(0, 100 - positive - negative)
+        data.append({
+            "timestamp": timestamp.isoformat(),
+            "positive": round(positive, 2),
+            "negative": round(negative, 2),
+            "neutral": round(neutral, 2),
+            "overall": round(overall, 2),
+            "confidence": round(random.uniform(0.5, 1.0), 2),
+            "volume_correlation": round(random.uniform(0.1, 1.0), 2),
+            "social_mentions": random.randint(100, 10000),
+            "news_sentiment": round(random.uniform(-1, 1), 2),
+            "fear_greed_index": round(random.uniform(0, 100), 1),
+            "market_cap_influence": round(random.uniform(0.1, 1.0), 2),
+            "trading_volume_24h": random.randint(1000000, 100000000),
+            "price_momentum": round(random.uniform(-10, 10), 2),
+            "volatility_index": round(random.uniform(0.1, 2.0), 2),
+            "technical_indicators": json.dumps({
+                "rsi": round(random.uniform(0, 100), 2),
+                "macd": round(random.uniform(-2, 2), 2)
+            }),
+            "market_context": json.dumps({
+                "btc_dominance": round(random.uniform(30, 70), 2),
+                "market_phase": "bull"
+            }),
+            "sources": json.dumps({
+                "twitter": round(random.uniform(0, 100), 2),
+                "reddit": round(random.uniform(0, 100), 2),
+            })
+        })
+    return data
+
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+# === GENERATOR ===
+def bench_generator(repeat=200):
+    return {time_range: bench_generator_range(time_range, repeat) for time_range in TIME_RANGES}
+
+
+def bench_generator_range(time_range="1w", repeat=200):
+    coin_ids = [coin["id"] for coin in SentimentAPI.POPULAR_COINS]
+
+    def legacy():
+        for coin_id in coin_ids:
+            legacy_generate(coin_id, time_range)
+
+    def vectorized():
+        series = SentimentSeries.generate(coin_ids, time_range)
+        for row in range(len(coin_ids)):
+            series.to_points(row)
+
+    def memoized():
+        SentimentAPI.generate_batch(coin_ids, [time_range])
+
+    series_cache.clear()
+    legacy_ms = timeit(legacy, repeat)
+    vectorized_ms = timeit(vectorized, repeat)
+    memoized_ms = timeit(memoized, repeat)
+    points = len(coin_ids) * SentimentAPI.get_intervals(time_range)["count"]
+    return {
+        "coins": len(coin_ids),
+        "points_per_coin": SentimentAPI.get_intervals(time_range)["count"],
+        "legacy_ms": round(legacy_ms, 3),
+        "vectorized_ms": round(vectorized_ms, 3),
+        "memoized_ms": round(memoized_ms, 3),
+        "vectorized_points_per_s": round(points / vectorized_ms * 1000),
+        "speedup": round(legacy_ms / vectorized_ms, 2),
+    }
+
+
+# === STORE ===
+# fills a throwaway WAL database with minute points for several coins, then
+# times the two store reads: bucket lookups for a range and a raw range scan
+def bench_store(rows=10_000_000, repeat=50, chunk=20_000):
+    coin_ids = [coin["id"] for coin in SentimentAPI.POPULAR_COINS]
+    coin_ids += [f"coin-{i}" for i in range(max(0, 10 - len(coin_ids)))]
+    per_coin = rows // len(coin_ids)
+    now = time.time()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SentimentData.__table__.create(engine)
+        store = SentimentStore(engine=engine, retention_days=3650)
+
+        start = time.perf_counter()
+        for offset in range(0, per_coin, chunk):
+            count = min(chunk, per_coin - offset)
+            store.ingest(SentimentSeries.generate(coin_ids, "1h", now - offset * 60, count=count))
+        ingest_s = time.perf_counter() - start
+
+        load_ms = {
+            time_range: round(timeit(lambda: store.load(coin_ids[:5], time_range, now), repeat), 3)
+            for time_range in ("1h", "1d", "1w")
+        }
+        end = datetime.utcfromtimestamp(now)
+        scan_ms = round(timeit(lambda: store.query_range("bitcoin", end - timedelta(days=1), end), repeat), 3)
+        engine.dispose()
+
+    return {
+        "rows": per_coin * len(coin_ids),
+        "coins": len(coin_ids),
+        "ingest_s": round(ingest_s, 2),
+        "ingest_rows_per_s": round(per_coin * len(coin_ids) / ingest_s),
+        "load_5_coins_ms": load_ms,
+        "scan_1d_minute_points_ms": scan_ms,
+    }
+
+
+# === SERIALIZATION ===
+# payload size and encode time of one 1w series in both wire formats
+def bench_wire(time_range="1w", repeat=200):
+    series = SentimentSeries.generate(["bitcoin"], time_range)
+    results = {}
+    for name, build in (("points", series.to_points), ("columnar", series.to_columns)):
+        payload = build(0)
+        if name == "columnar":
+            payload = {"coin_id": "bitcoin", "time_range": time_range, "count": len(series.timestamps), "columns": payload}
+        body = app.json.dumps(payload).encode("utf-8")
+        results[name] = {
+            "build_ms": round(timeit(lambda: build(0), repeat), 3),
+            "serialize_ms": round(timeit(lambda: app.json.dumps(payload), repeat), 3),
+            "payload_bytes": len(body),
+            "gzip_payload_bytes": len(gzip.compress(body, compresslevel=6)),
+            "gzip_ms": round(timeit(lambda: gzip.compress(body, compresslevel=6), repeat), 3),
+        }
+    # the browser also has to JSON.parse the three nested strings of every point
+    results["points"]["nested_json_strings"] = 3 * len(series.timestamps)
+    return results
+
+
+# === INDICATORS ===
+# cold start of one coin's indicators: per-point update() loop vs backfill()
+def bench_indicators(points=2880, repeat=20):
+    series = SentimentSeries.generate(["bitcoin"], "1h", count=points)
+    timestamps = series.timestamps[::-1]
+    overall = series.columns["overall"][0][::-1]
+    volume = series.columns["trading_volume_24h"][0][::-1].astype(float)
+    rows = list(zip(timestamps.tolist(), overall.tolist(), volume.tolist()))
+
+    def loop():
+        state = IndicatorState()
+        for row in rows:
+            state.update(*row)
+
+    loop_ms = timeit(loop, repeat)
+    return {
+        "points": points,
+        "update_loop_ms": round(loop_ms, 3),
+        "update_us": round(loop_ms * 1000 / points, 2),
+        "backfill_ms": round(timeit(lambda: IndicatorState().backfill(timestamps, overall, volume), repeat), 3),
+    }
+
+
+# === ALERTS ===
+# the client-side approach: scan every enabled alert on each new point
+def linear_scan(alerts, previous, current):
+    fired = []
+    for alert in alerts:
+        before, after = previous[alert["alert_type"]], current[alert["alert_type"]]
+        t = alert["threshold"]
+        if alert["condition"] == "above" and before <= t < after:
+            fired.append(alert["id"])
+        elif alert["condition"] == "below" and after < t <= before:
+            fired.append(alert["id"])
+    return fired
+
+
+def bench_alerts(alerts=100_000, points=1000):
+    rng = random.Random(42)
+    ranges = {"positive": (0, 100), "negative": (0, 100), "overall": (-20, 20)}
+    rows = []
+    for i in range(alerts):
+        alert_type = rng.choice(ALERT_TYPES)
+        rows.append({
+            "id": i, "coin_id": "bitcoin", "alert_type": alert_type, "condition": rng.choice(ALERT_CONDITIONS),
+            "threshold": round(rng.uniform(*ranges[alert_type]), 2), "enabled": True,
+        })
+
+    start = time.perf_counter()
+    AlertEngine().rebuild(rows)
+    rebuild_ms = (time.perf_counter() - start) * 1000
+
+    # engine output is white noise, so every minute swings across a large share
+    # of all thresholds; a random walk with small steps is the realistic case
+    series = SentimentSeries.generate(["bitcoin"], "1h", count=points).to_points(0)[::-1]
+    noisy = [(p["timestamp"], {t: p[t] for t in ALERT_TYPES}) for p in series]
+    walk, current = [], {"positive": 50.0, "negative": 50.0, "overall": 0.0}
+    for i in range(points):
+        current = {t: round(v + rng.uniform(-0.5, 0.5), 2) for t, v in current.items()}
+        walk.append((f"{i:08d}", current))
+
+    def run(sequence):
+        engine = AlertEngine(history=1)
+        engine.rebuild(rows)
+        latencies, fired = [], 0
+        for timestamp, values in sequence:
+            start = time.perf_counter()
+            fired += len(engine.evaluate("bitcoin", timestamp, values))
+            latencies.append((time.perf_counter() - start) * 1e6)
+        latencies.sort()
+        return {
+            "fired_per_point": round(fired / points, 1),
+            "evaluate_p50_us": round(latencies[len(latencies) // 2], 1),
+            "evaluate_p99_us": round(latencies[int(len(latencies) * 0.99)], 1),
+        }
+
+    scan_points = min(points, 50)
+    values = [v for _, v in walk]
+    start = time.perf_counter()
+    for previous, current in zip(values[:scan_points], values[1:scan_points + 1]):
+        linear_scan(rows, previous, current)
+    scan_us = (time.perf_counter() - start) / scan_points * 1e6
+
+    return {
+        "alerts": alerts,
+        "points": points,
+        "rebuild_ms": round(rebuild_ms, 2),
+        "random_walk": run(walk),
+        "engine_noise": run(noisy),
+        "linear_scan_mean_us": round(scan_us, 1),
+    }
+
+
+# === ROUTES ===
+# Local stand-in for CoinGecko's /coins/markets, with a fixed upstream delay.
+class CoinGeckoStub:
+    def __init__(self, latency=0.02):
+        stub = self
+        self.latency = latency
+        self.calls = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls += 1
+                time.sleep(stub.latency)
+                ids = parse_qs(urlparse(self.path).query).get("ids", [""])[0].split(",")
+                body = json.dumps([
+                    {"id": coin_id, "symbol": coin_id[:3], "name": coin_id.title(), "current_price": 100.0 + i,
+                     "market_cap": 1e9, "total_volume": 1e8, "price_change_percentage_24h": 1.5}
+                    for i, coin_id in enumerate(ids) if coin_id
+                ]).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._previous_url = app_module.market_data.base_url
+        app_module.market_data.base_url = self.url
+        app_module.market_data.cache.clear()
+        return self
+
+    def __exit__(self, *exc):
+        app_module.market_data.base_url = self._previous_url
+        self.server.shutdown()
+        self.server.server_close()
+
+
+ROUTES = {
+    "coins": "/api/coins",
+    "sentiment_1d": "/api/sentiment/bitcoin?timeRange=1d",
+    "sentiment_1w": "/api/sentiment/bitcoin?timeRange=1w",
+    "sentiment_1w_columnar": "/api/sentiment/bitcoin?timeRange=1w&format=columnar",
+    "coin": "/api/coin/bitcoin",
+}
+
+
+def _init_db():
+    with app.app_context():
+        app_module.init_db()
+
+
+def bench_routes(repeat=200, upstream_latency=0.02):
+    _init_db()
+    client = app.test_client()
+    results = {}
+    with CoinGeckoStub(upstream_latency) as stub:
+        for name, path in ROUTES.items():
+            series_cache.clear()
+            app_module.response_cache.clear()
+            app_module.market_data.cache.clear()
+            start = time.perf_counter()
+            status = client.get(path).status_code
+            first_ms = (time.perf_counter() - start) * 1000
+
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                client.get(path)
+                samples.append((time.perf_counter() - start) * 1000)
+            results[name] = dict(percentiles(samples), status=status, first_ms=round(first_ms, 3))
+
+        # every request misses the cache and goes upstream
+        samples = []
+        for _ in range(min(repeat, 50)):
+            app_module.market_data.cache.clear()
+            start = time.perf_counter()
+            client.get(ROUTES["coin"])
+            samples.append((time.perf_counter() - start) * 1000)
+        results["coin_uncached"] = percentiles(samples)
+        results["upstream_calls"] = stub.calls
+    return results
+
+
+# === LOAD ===
+# N threads issue the route mix back to back for `duration` seconds, either
+# in-process through the test client or over HTTP against --url.
+def bench_load(threads=8, duration=5.0, url=None, upstream_latency=0.02):
+    paths = list(ROUTES.values())
+    deadline = time.perf_counter() + duration
+    samples = {path: [] for path in paths}
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index):
+        if url:
+            session = requests.Session()
+            fetch = lambda path: session.get(url.rstrip("/") + path, timeout=30).status_code
+        else:
+            client = app.test_client()
+            fetch = lambda path: client.get(path).status_code
+        local = {path: [] for path in paths}
+        failed = 0
+        i = index
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = fetch(path) < 500
+            except requests.RequestException:
+                ok = False
+            local[path].append((time.perf_counter() - start) * 1000)
+            failed += not ok
+        with lock:
+            for path, values in local.items():
+                samples[path].extend(values)
+            errors[0] += failed
+
+    def run():
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+        return time.perf_counter() - started
+
+    if url:
+        elapsed = run()
+    else:
+        _init_db()
+        with CoinGeckoStub(upstream_latency):
+            elapsed = run()
+
+    everything = [value for values in samples.values() for value in values]
+    return {
+        "target": url or "in-process",
+        "threads": threads,
+        "duration_s": round(elapsed, 2),
+        "requests": len(everything),
+        "errors": errors[0],
+        "requests_per_s": round(len(everything) / elapsed, 1),
+        "overall": percentiles(everything),
+        "routes": {name: percentiles(samples[path]) for name, path in ROUTES.items()},
+    }
+
+
+# === REPORT ===
+def run_metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# keys where bigger is better; every other *_ms / *_us / *_s / *_bytes number
+# is a cost. Run settings and the frozen legacy generator are not compared.
+_HIGHER_IS_BETTER = ("requests_per_s", "points_per_s", "rows_per_s", "speedup")
+_COSTS = ("_ms", "_us", "_s", "_bytes")
+_NOT_COMPARED = ("duration_s", "legacy_ms")
+
+
+def compare(baseline, current, threshold=0.10, path=""):
+    changes = []
+    if isinstance(current, dict):
+        for key, value in current.items():
+            if isinstance(baseline, dict) and key in baseline:
+                changes += compare(baseline[key], value, threshold, f"{path}.{key}" if path else key)
+        return changes
+    if not isinstance(current, (int, float)) or isinstance(current, bool) or not baseline:
+        return changes
+
+    name = path.rsplit(".", 1)[-1]
+    if name in _NOT_COMPARED:
+        return changes
+    if name.endswith(_HIGHER_IS_BETTER):
+        regression = current < baseline * (1 - threshold)
+    elif name.endswith(_COSTS):
+        regression = current > baseline * (1 + threshold)
+    else:
+        return changes
+    changes.append({
+        "metric": path,
+        "baseline": baseline,
+        "current": current,
+        "ratio": round(current / baseline, 3),
+        "regression": regression,
+    })
+    return changes
+
+
+SUITES = ("generator", "serialization", "routes", "load", "alerts", "indicators", "store")
+DEFAULT_SUITES = ("generator", "serialization", "routes", "load", "alerts", "indicators")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the sentiment API; prints JSON.")
+    parser.add_argument("--suite", action="append", choices=SUITES,
+                        help="suite to run (repeatable); default: all but store")
+    parser.add_argument("--time-range", default="1w", help="series used by the serialization suite")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--store-rows", type=int, default=10_000_000)
+    parser.add_argument("--threads", type=int, default=8, help="load suite: concurrent clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="load suite: seconds to run")
+    parser.add_argument("--url", help="load suite: hit a running server instead of the test client")
+    parser.add_argument("--upstream-latency", type=float, default=0.02, help="CoinGecko stub delay (s)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier report to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as regression")
+    args = parser.parse_args()
+
+    runners = {
+        "generator": lambda: bench_generator(args.repeat),
+        "serialization": lambda: bench_wire(args.time_range, args.repeat),
+        "routes": lambda: bench_routes(args.repeat, args.upstream_latency),
+        "load": lambda: bench_load(args.threads, args.duration, args.url, args.upstream_latency),
+        "alerts": lambda: bench_alerts(args.alerts),
+        "indicators": lambda: bench_indicators(),
+        "store": lambda: bench_store(args.store_rows),
+    }
+    report = {"meta": run_metadata(), "results": {}}
+    for suite in args.suite or DEFAULT_SUITES:
+        report["results"][suite] = runners[suite]()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        changes = compare(baseline.get("results", {}), report["results"], args.threshold)
+        report["comparison"] = {
+            "baseline": baseline.get("meta"),
+            "regressions": [change for change in changes if change["regression"]],
+            "changes": changes,
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
@@ -0,0 +1,310 @@
+import csv
+import io
+import itertools
+import json
+import tempfile
+import zipfile
+import zlib
+
+import numpy as np
+
+# Writers take an iterator of ExportChunk and yield encoded pieces, so a
+# response never holds more than one chunk of points in memory.
+
+RAW_SENTIMENT_FIELDS = (
+    "positive", "negative", "neutral", "overall", "confidence", "volume_correlation",
+    "social_mentions", "news_sentiment", "fear_greed_index", "market_cap_influence",
+    "trading_volume_24h", "price_momentum", "volatility_index",
+)
+TECHNICAL_FIELDS = ("rsi", "macd")
+MARKET_CONTEXT_FIELDS = ("btc_dominance", "market_phase")
+SOURCE_FIELDS = ("twitter", "reddit")
+
+EXPORT_OPTIONS = {
+    "includeRawSentiment": RAW_SENTIMENT_FIELDS,
+    "includeTechnicalIndicators": TECHNICAL_FIELDS,
+    "includeMarketContext": MARKET_CONTEXT_FIELDS,
+    "includeSources": SOURCE_FIELDS,
+    "includeMetadata": (),
+}
+
+MARKET_PHASE_CODES = {"bull": 1, "sideways": 0, "bear": -1}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "ml-ready": ("application/json", "ml_ready.json"),
+    "npz": ("application/octet-stream", "npz"),
+}
+
+
+# one coin, oldest point first; columns are NumPy arrays keyed like STORE_COLUMNS
+class ExportChunk:
+    def __init__(self, coin_id, timestamps, columns):
+        self.coin_id = coin_id
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def iso_timestamps(self):
+        return np.datetime_as_string(self.timestamps.astype("datetime64[s]")).tolist()
+
+    def values(self, name):
+        return self.columns[name].tolist()
+
+
+def selected_fields(options):
+    return [field for option, fields in EXPORT_OPTIONS.items() if options.get(option) for field in fields]
+
+
+def gzip_stream(pieces, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for piece in pieces:
+        data = compressor.compress(piece.encode("utf-8") if isinstance(piece, str) else piece)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# === CSV ===
+def stream_csv(chunks, options, metadata):
+    fields = selected_fields(options)
+    meta_fields = ["coin_name", "time_range", "current_price", "export_timestamp"] if options.get("includeMetadata") else []
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["timestamp", "coin_id", *fields, *meta_fields])
+    yield buffer.getvalue()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        columns = [chunk.iso_timestamps(), itertools.repeat(chunk.coin_id)]
+        columns += [chunk.values(field) for field in fields]
+        columns += [itertools.repeat(metadata["coin_names"].get(chunk.coin_id, chunk.coin_id))] if meta_fields else []
+        columns += [itertools.repeat(metadata[name]) for name in meta_fields[1:]]
+        writer.writerows(zip(*columns))
+        yield buffer.getvalue()
+
+
+# === JSON ===
+def stream_json(chunks, options, metadata):
+    head = {}
+    if options.get("includeMetadata"):
+        head["metadata"] = dict(_public_metadata(metadata), export_options=options)
+    yield json.dumps(head)[:-1] + (", " if head else "") + '"sentiment_data": ['
+
+    first = True
+    for chunk in chunks:
+        points = _json_points(chunk, options)
+        if not points:
+            continue
+        yield ("" if first else ", ") + json.dumps(points)[1:-1]
+        first = False
+    yield "]}"
+
+
+def _json_points(chunk, options):
+    groups = []
+    if options.get("includeRawSentiment"):
+        groups.append(("sentiment", ("positive", "negative", "neutral", "overall", "confidence")))
+        groups.append(("metrics", RAW_SENTIMENT_FIELDS[5:]))
+    if options.get("includeTechnicalIndicators"):
+        groups.append(("technical_indicators", TECHNICAL_FIELDS))
+    if options.get("includeMarketContext"):
+        groups.append(("market_context", MARKET_CONTEXT_FIELDS))
+    if options.get("includeSources"):
+        groups.append(("sources", SOURCE_FIELDS))
+
+    values = {field: chunk.values(field) for _, fields in groups for field in fields}
+    points = []
+    for i, ts in enumerate(chunk.iso_timestamps()):
+        point = {"timestamp": ts, "coin_id": chunk.coin_id}
+        for group, fields in groups:
+            point[group] = {field: values[field][i] for field in fields}
+        points.append(point)
+    return points
+
+
+# === ML-READY ===
+ML_BASE_FEATURES = (
+    "positive_sentiment", "negative_sentiment", "neutral_sentiment", "confidence",
+    "volume_correlation", "social_mentions_normalized", "news_sentiment", "fear_greed_index",
+    "market_cap_influence", "trading_volume_normalized", "price_momentum", "volatility_index",
+)
+
+ML_LABEL_DESCRIPTIONS = {
+    "sentiment_direction": "Sentiment direction: 1=bullish, 0=neutral, -1=bearish",
+    "sentiment_strength": "Absolute sentiment strength (0-100)",
+    "market_phase": "Market phase: bull/bear/sideways",
+    "high_confidence": "High confidence prediction: 1=yes, 0=no",
+}
+
+
+def ml_feature_names(options):
+    names = list(ML_BASE_FEATURES)
+    if options.get("includeTechnicalIndicators"):
+        names += ["rsi", "macd"]
+    if options.get("includeMarketContext"):
+        names += ["btc_dominance", "market_phase_encoded"]
+    if options.get("includeSources"):
+        names += ["twitter_sentiment", "reddit_sentiment"]
+    return names
+
+
+def _ml_features(chunk, options):
+    c = chunk.columns
+    columns = [
+        c["positive"], c["negative"], c["neutral"], c["confidence"], c["volume_correlation"],
+        c["social_mentions"] / 1000, c["news_sentiment"], c["fear_greed_index"],
+        c["market_cap_influence"], c["trading_volume_24h"] / 1000000, c["price_momentum"],
+        c["volatility_index"],
+    ]
+    if options.get("includeTechnicalIndicators"):
+        columns += [c["rsi"], c["macd"]]
+    if options.get("includeMarketContext"):
+        columns += [c["btc_dominance"], encode_market_phase(c["market_phase"])]
+    if options.get("includeSources"):
+        columns += [c["twitter"], c["reddit"]]
+    return np.column_stack(columns)
+
+
+def stream_ml_ready(chunks, options, metadata):
+    feature_names = ml_feature_names(options)
+    head = {
+        "dataset_info": {
+            "name": f"{metadata['dataset_name']}_sentiment_dataset",
+            "coin_ids": metadata["coin_ids"],
+            "time_range": metadata["time_range"],
+            "samples": metadata["samples"],
+            "feature_count": len(feature_names),
+            "created_at": metadata["export_timestamp"],
+            "description": "Cryptocurrency sentiment analysis dataset ready for ML training",
+        },
+        "feature_names": feature_names,
+        "label_descriptions": ML_LABEL_DESCRIPTIONS,
+    }
+    yield json.dumps(head)[:-1] + ', "data": ['
+
+    first = True
+    for chunk in chunks:
+        overall = chunk.columns["overall"]
+        features = _ml_features(chunk, options).tolist()
+        direction = np.where(overall > 5, 1, np.where(overall < -5, -1, 0)).tolist()
+        strength = np.abs(overall).tolist()
+        high_confidence = (chunk.columns["confidence"] > 0.8).astype(int).tolist()
+        phases = chunk.values("market_phase")
+        rows = [
+            {
+                "features": f,
+                "labels": {"sentiment_direction": d, "sentiment_strength": s, "market_phase": p, "high_confidence": h},
+                "timestamp": ts,
+                "coin_id": chunk.coin_id,
+                "raw_overall_score": o,
+            }
+            for f, d, s, p, h, ts, o in zip(
+                features, direction, strength, phases, high_confidence, chunk.iso_timestamps(), overall.tolist()
+            )
+        ]
+        if rows:
+            yield ("" if first else ", ") + json.dumps(rows)[1:-1]
+            first = False
+    yield "]}"
+
+
+# === NPZ (COLUMNAR) ===
+# One .npy member per column, as np.load expects. Members must be written one
+# after another, so chunks are spooled to one temp file per column (disk, not
+# RAM) and then copied into the zip stream.
+def encode_market_phase(phases):
+    return np.array([MARKET_PHASE_CODES.get(p, 0) for p in phases], dtype=np.int8)
+
+
+class _ZipSink:
+    def __init__(self):
+        self._pieces = []
+
+    def write(self, data):
+        self._pieces.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._pieces)
+        self._pieces = []
+        return data
+
+
+def _npy_header(dtype, shape):
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": shape,
+    })
+    return header.getvalue()
+
+
+def stream_npz(chunks, options, metadata, compress=False, copy_size=1 << 20):
+    fields = selected_fields(options)
+    coin_ids = metadata["coin_ids"]
+    coin_index = {coin_id: i for i, coin_id in enumerate(coin_ids)}
+    names = ["timestamp", "coin", *fields]
+    dtypes = {"timestamp": np.dtype("datetime64[s]"), "coin": np.dtype(np.int16), "market_phase": np.dtype(np.int8)}
+    spools = {name: tempfile.TemporaryFile() for name in names}
+
+    try:
+        total = 0
+        for chunk in chunks:
+            arrays = {
+                "timestamp": chunk.timestamps.astype("datetime64[s]"),
+                "coin": np.full(len(chunk), coin_index[chunk.coin_id], dtype=np.int16),
+            }
+            for field in fields:
+                values = chunk.columns[field]
+                arrays[field] = encode_market_phase(values) if field == "market_phase" else values
+            for name, values in arrays.items():
+                dtypes.setdefault(name, values.dtype)
+                spools[name].write(np.ascontiguousarray(values, dtype=dtypes[name]).tobytes())
+            total += len(chunk)
+
+        sink = _ZipSink()
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(sink, mode="w", compression=compression) as archive:
+            coin_names = np.array(coin_ids)
+            archive.writestr("coin_ids.npy", _npy_header(coin_names.dtype, coin_names.shape) + coin_names.tobytes())
+            for name in names:
+                spool = spools[name]
+                spool.seek(0)
+                with archive.open(f"{name}.npy", mode="w", force_zip64=True) as member:
+                    member.write(_npy_header(dtypes.get(name, np.dtype(np.float64)), (total,)))
+                    for block in iter(lambda: spool.read(copy_size), b""):
+                        member.write(block)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        for spool in spools.values():
+            spool.close()
+
+
+def _public_metadata(metadata):
+    return {
+        "coin_ids": metadata["coin_ids"],
+        "coin_names": metadata["coin_names"],
+        "time_range": metadata["time_range"],
+        "current_price": metadata["current_price"],
+        "export_timestamp": metadata["export_timestamp"],
+        "data_points": metadata["samples"],
+    }
+
+
+WRITERS = {
+    "csv": stream_csv,
+    "json": stream_json,
+    "ml-ready": stream_ml_ready,
+}
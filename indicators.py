@@ -0,0 +1,326 @@
+from collections import deque
+import math
+import threading
+
+import numpy as np
+
+# === ROLLING INDICATORS ===
+# Every indicator keeps O(1) state and is advanced one point at a time with
+# update(). backfill() is the vectorized cold start: it puts an indicator in
+# the same state as feeding the whole series through update(), without a
+# Python loop over the points.
+
+
+def ema_series(values, alpha, seed, block=64):
+    # y[t] = (1 - alpha) * y[t - 1] + alpha * x[t], computed a block at a time:
+    # inside a block y = decay**(j + 1) * carry + (alpha * lower-triangular
+    # decay matrix) @ x, so the cost is O(n * block) in NumPy, not n Python steps
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1.0 - alpha
+    j = np.arange(block)
+    lags = j[:, None] - j[None, :]
+    weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    carry_weights = decay ** (j + 1)
+
+    out = np.empty_like(values)
+    carry = seed
+    for start in range(0, len(values), block):
+        x = values[start:start + block]
+        n = len(x)
+        y = carry_weights[:n] * carry + weights[:n, :n] @ x
+        out[start:start + n] = y
+        carry = y[-1]
+    return out
+
+
+class EMA:
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def backfill(self, values):
+        if len(values) == 0:
+            return np.empty(0)
+        seed = values[0] if self.value is None else self.value
+        series = ema_series(values, self.alpha, seed)
+        self.value = float(series[-1])
+        return series
+
+
+class WilderRSI:
+    def __init__(self, period=14):
+        self.period = period
+        self.previous = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self._seed = []
+
+    def update(self, x):
+        if self.previous is None:
+            self.previous = x
+            return None
+        change = x - self.previous
+        self.previous = x
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        if self.avg_gain is None:
+            # the first average is a plain mean of `period` changes
+            self._seed.append((gain, loss))
+            if len(self._seed) == self.period:
+                self.avg_gain = sum(g for g, _ in self._seed) / self.period
+                self.avg_loss = sum(l for _, l in self._seed) / self.period
+                self._seed = []
+            return self.value
+        self.avg_gain += (gain - self.avg_gain) / self.period
+        self.avg_loss += (loss - self.avg_loss) / self.period
+        return self.value
+
+    def backfill(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) <= self.period:
+            for x in values.tolist():
+                self.update(x)
+            return
+        changes = np.diff(values)
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+        alpha = 1.0 / self.period
+        seed_gain = gains[:self.period].mean()
+        seed_loss = losses[:self.period].mean()
+        rest = slice(self.period, None)
+        self.avg_gain = float(ema_series(gains[rest], alpha, seed_gain)[-1]) if len(gains) > self.period else seed_gain
+        self.avg_loss = float(ema_series(losses[rest], alpha, seed_loss)[-1]) if len(losses) > self.period else seed_loss
+        self.previous = float(values[-1])
+        self._seed = []
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, x):
+        macd = self.fast.update(x) - self.slow.update(x)
+        self.signal.update(macd)
+        return self.value
+
+    def backfill(self, values):
+        if len(values) == 0:
+            return
+        macd = self.fast.backfill(values) - self.slow.backfill(values)
+        self.signal.backfill(macd)
+
+    @property
+    def value(self):
+        if self.signal.value is None:
+            return None
+        macd = self.fast.value - self.slow.value
+        return {"macd": macd, "signal": self.signal.value, "histogram": macd - self.signal.value}
+
+
+class RollingWindow:
+    # windowed Welford: mean and variance updated as points enter and leave.
+    # Removals let rounding error pile up in m2 when the spread is small next
+    # to the mean, so every `window` updates both are recomputed from the
+    # window itself (amortized O(1)).
+    def __init__(self, window=20):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._steps = 0
+
+    def update(self, x):
+        self.values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (x - self.mean)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            delta = old - self.mean
+            self.mean -= delta / len(self.values)
+            self.m2 -= delta * (old - self.mean)
+        self._steps += 1
+        if self._steps >= self.window:
+            self._recompute()
+        return self.mean
+
+    def _recompute(self):
+        self._steps = 0
+        self.mean = sum(self.values) / len(self.values)
+        self.m2 = sum((x - self.mean) ** 2 for x in self.values)
+
+    def backfill(self, values):
+        tail = np.asarray(values, dtype=np.float64)[-self.window:]
+        merged = np.concatenate([np.array(self.values, dtype=np.float64), tail])[-self.window:]
+        self.values = deque(merged.tolist())
+        self.mean = float(merged.mean()) if len(merged) else 0.0
+        self.m2 = float(((merged - self.mean) ** 2).sum()) if len(merged) else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / len(self.values)) if self.values else 0.0
+
+    @property
+    def sma(self):
+        return self.mean if self.values else None
+
+
+class Bollinger:
+    def __init__(self, window=20, width=2.0):
+        self.stats = RollingWindow(window)
+        self.width = width
+        self.last = None
+
+    def update(self, x):
+        self.stats.update(x)
+        self.last = x
+        return self.value
+
+    def backfill(self, values):
+        if len(values):
+            self.stats.backfill(values)
+            self.last = float(values[-1])
+
+    @property
+    def value(self):
+        if self.last is None:
+            return None
+        middle, spread = self.stats.mean, self.width * self.stats.std
+        upper, lower = middle + spread, middle - spread
+        position = (self.last - lower) / (upper - lower) if upper > lower else 0.5
+        return {"upper": upper, "middle": middle, "lower": lower, "position": position}
+
+
+# === ROLLUPS ===
+class Rollup:
+    # fixed-size buckets of `resolution` seconds; keeps the last `keep` closed ones
+    def __init__(self, resolution, keep):
+        self.resolution = resolution
+        self.closed = deque(maxlen=keep)
+        self.current = None
+
+    def update(self, bucket):
+        # bucket: {"timestamp", "open", "high", "low", "close", "sum", "volume", "count"}
+        start = bucket["timestamp"] - bucket["timestamp"] % self.resolution
+        if self.current is not None and start != self.current["timestamp"]:
+            self.closed.append(self.current)
+            self.current = None
+        if self.current is None:
+            self.current = dict(bucket, timestamp=start)
+        else:
+            c = self.current
+            c["high"] = max(c["high"], bucket["high"])
+            c["low"] = min(c["low"], bucket["low"])
+            c["close"] = bucket["close"]
+            c["sum"] += bucket["sum"]
+            c["volume"] += bucket["volume"]
+            c["count"] += bucket["count"]
+
+    def backfill(self, timestamps, values, volumes):
+        starts = timestamps - timestamps % self.resolution
+        edges = np.flatnonzero(np.diff(starts)) + 1
+        # only the buckets that survive in `closed`, plus the open one
+        heads = np.concatenate([[0], edges])[-(self.closed.maxlen + 1):]
+        tails = np.concatenate([edges, [len(starts)]])[-(self.closed.maxlen + 1):] - 1
+        groups = {
+            "timestamp": starts[heads].tolist(),
+            "open": values[heads].tolist(),
+            "high": np.maximum.reduceat(values[heads[0]:], heads - heads[0]).tolist(),
+            "low": np.minimum.reduceat(values[heads[0]:], heads - heads[0]).tolist(),
+            "close": values[tails].tolist(),
+            "sum": np.add.reduceat(values[heads[0]:], heads - heads[0]).tolist(),
+            "volume": np.add.reduceat(volumes[heads[0]:], heads - heads[0]).tolist(),
+            "count": (tails - heads + 1).tolist(),
+        }
+        buckets = [dict(zip(groups, row)) for row in zip(*groups.values())]
+        self.closed.extend(buckets[:-1])
+        self.current = buckets[-1]
+
+    def snapshot(self):
+        buckets = list(self.closed) + ([self.current] if self.current else [])
+        return [
+            {
+                "timestamp": b["timestamp"],
+                "open": b["open"],
+                "high": b["high"],
+                "low": b["low"],
+                "close": b["close"],
+                "mean": b["sum"] / b["count"],
+                "volume": b["volume"],
+                "count": b["count"],
+            }
+            for b in buckets
+        ]
+
+
+ROLLUPS = (("1m", 60, 60), ("5m", 300, 48), ("1h", 3600, 48))
+
+
+class IndicatorState:
+    # indicators run over the overall sentiment score; the volume SMA over
+    # trading_volume_24h. Each rollup aggregates the minute points on its own.
+    def __init__(self):
+        self.rsi = WilderRSI(14)
+        self.macd = MACD(12, 26, 9)
+        self.bollinger = Bollinger(20, 2.0)
+        self.volume = RollingWindow(20)
+        self.rollups = [Rollup(resolution, keep) for _, resolution, keep in ROLLUPS]
+        self.last_timestamp = None
+        self.last_volume = None
+        self.lock = threading.Lock()
+
+    def update(self, timestamp, overall, volume):
+        with self.lock:
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return
+            self.last_timestamp = timestamp
+            self.last_volume = volume
+            self.rsi.update(overall)
+            self.macd.update(overall)
+            self.bollinger.update(overall)
+            self.volume.update(volume)
+
+            for rollup in self.rollups:
+                rollup.update({"timestamp": timestamp, "open": overall, "high": overall, "low": overall,
+                               "close": overall, "sum": overall, "volume": volume, "count": 1})
+
+    def backfill(self, timestamps, overall, volume):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        overall = np.asarray(overall, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        with self.lock:
+            self.rsi.backfill(overall)
+            self.macd.backfill(overall)
+            self.bollinger.backfill(overall)
+            self.volume.backfill(volume)
+            for rollup in self.rollups:
+                rollup.backfill(timestamps, overall, volume)
+            self.last_timestamp = int(timestamps[-1])
+            self.last_volume = float(volume[-1])
+
+    def summary(self):
+        with self.lock:
+            sma = self.volume.sma
+            return {
+                "timestamp": self.last_timestamp,
+                "rsi": self.rsi.value,
+                "macd": self.macd.value,
+                "bollinger": self.bollinger.value,
+                "volume_sma": sma,
+                "volume_sma_ratio": self.last_volume / sma if sma else None,
+                "rollups": {name: rollup.snapshot() for (name, _, _), rollup in zip(ROLLUPS, self.rollups)},
+            }
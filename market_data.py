@@ -0,0 +1,214 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+COINGECKO_API_URL = os.environ.get("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
+
+
+# cached for ids the API does not know; pickles by reference, so the same
+# sentinel comes back out of a SharedCache
+class _NotFound:
+    def __reduce__(self):
+        return "_NOT_FOUND"
+
+
+_NOT_FOUND = _NotFound()
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# === CACHE ===
+# LRU ordered dict whose entries remember when they were stored. Entries older
+# than ttl are stale; entries older than ttl + stale_ttl are dropped.
+class TTLCache:
+    def __init__(self, ttl=60, stale_ttl=300, maxsize=512):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        # returns (value, is_fresh) or None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value, age <= self.ttl
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"entries": len(self), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+# === COINGECKO CLIENT ===
+class MarketDataClient:
+    def __init__(self, base_url=COINGECKO_API_URL, bulk_ids=(), ttl=60, stale_ttl=300,
+                 maxsize=512, timeout=(3.05, 10), pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.bulk_ids = tuple(bulk_ids)
+        self.timeout = timeout
+        self.cache = TTLCache(ttl=ttl, stale_ttl=stale_ttl, maxsize=maxsize)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept": "application/json"})
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+            "upstream_latency_ms_total": 0.0,
+            "upstream_latency_ms_max": 0.0,
+        }
+
+    def get_coin(self, coin_id):
+        cached = self.cache.get(coin_id)
+        if cached is not None:
+            value, fresh = cached
+            if fresh:
+                self._count("hits")
+            else:
+                self._count("stale_hits")
+                self._revalidate(coin_id)
+            return None if value is _NOT_FOUND else value
+
+        self._count("misses")
+        self._single_flight(self._flight_key(coin_id), self._fetch_ids(coin_id))
+        cached = self.cache.get(coin_id)
+        if cached is None or cached[0] is _NOT_FOUND:
+            return None
+        return cached[0]
+
+    def refresh_bulk(self, coin_ids=None):
+        ids = tuple(coin_ids) if coin_ids is not None else self.bulk_ids
+        if ids:
+            self._single_flight(("bulk",) + ids, ids)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats["upstream_calls"]
+        stats["upstream_latency_ms_avg"] = round(stats["upstream_latency_ms_total"] / calls, 3) if calls else 0.0
+        stats["upstream_latency_ms_total"] = round(stats["upstream_latency_ms_total"], 3)
+        stats["upstream_latency_ms_max"] = round(stats["upstream_latency_ms_max"], 3)
+        stats["cached_entries"] = len(self.cache)
+        return stats
+
+    # a miss on any popular coin refreshes all of them in one ids=a,b,c call
+    def _fetch_ids(self, coin_id):
+        return self.bulk_ids if coin_id in self.bulk_ids else (coin_id,)
+
+    def _flight_key(self, coin_id):
+        ids = self._fetch_ids(coin_id)
+        return ("bulk",) + ids if len(ids) > 1 else (coin_id,)
+
+    def _revalidate(self, coin_id):
+        key = self._flight_key(coin_id)
+        with self._lock:
+            if key in self._inflight:
+                return
+            flight = self._inflight[key] = _Flight()
+        threading.Thread(target=self._run_flight, args=(key, self._fetch_ids(coin_id), flight), daemon=True).start()
+
+    def _single_flight(self, key, ids):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if leader:
+            self._run_flight(key, ids, flight)
+        else:
+            self._count("coalesced")
+            wait = sum(self.timeout) if isinstance(self.timeout, tuple) else self.timeout
+            if not flight.done.wait(wait):
+                raise UpstreamError("Timeout aguardando a API CoinGecko")
+
+        if flight.error is not None:
+            raise flight.error
+
+    def _run_flight(self, key, ids, flight):
+        try:
+            self._fetch(ids)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _fetch(self, ids):
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                f"{self.base_url}/coins/markets",
+                params={"vs_currency": "usd", "ids": ",".join(ids)},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            self._record_upstream(start, error=True)
+            raise UpstreamError(str(e))
+        self._record_upstream(start, error=response.status_code != 200)
+
+        if response.status_code != 200:
+            raise UpstreamError("Erro na API CoinGecko", response.status_code)
+
+        found = {coin["id"]: coin for coin in response.json()}
+        for coin_id in ids:
+            self.cache.set(coin_id, found.get(coin_id, _NOT_FOUND))
+
+    def _record_upstream(self, start, error=False):
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats["upstream_calls"] += 1
+            self._stats["upstream_latency_ms_total"] += elapsed
+            self._stats["upstream_latency_ms_max"] = max(self._stats["upstream_latency_ms_max"], elapsed)
+            if error:
+                self._stats["upstream_errors"] += 1
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
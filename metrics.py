@@ -0,0 +1,113 @@
+from bisect import bisect_left
+import mmap
+import threading
+
+import numpy as np
+
+# === REQUEST METRICS ===
+# Latency histograms per route and in-flight counts, in an anonymous shared
+# mmap created before the workers fork. Every worker only writes its own row
+# (guarded by a thread lock inside that worker), so no cross-process locking
+# is needed; snapshot() sums the rows of all workers.
+
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+UNMATCHED = "<unmatched>"
+
+# per route: one counter per bucket plus +Inf, then count, sum_ms, errors
+_COUNT = len(LATENCY_BUCKETS_MS) + 1
+_SUM = _COUNT + 1
+_ERRORS = _COUNT + 2
+_WIDTH = _COUNT + 3
+
+
+class MetricsBoard:
+    def __init__(self, routes, workers=1):
+        self.routes = list(dict.fromkeys(list(routes) + [UNMATCHED]))
+        self._index = {route: i for i, route in enumerate(self.routes)}
+        self.workers = workers
+        self.worker = 0
+        self._lock = threading.Lock()
+
+        cells = workers * (len(self.routes) * _WIDTH + 1)
+        self._map = mmap.mmap(-1, cells * 8)
+        values = np.frombuffer(self._map, dtype=np.float64)
+        self._latency = values[:workers * len(self.routes) * _WIDTH].reshape(workers, len(self.routes), _WIDTH)
+        self._in_flight = values[workers * len(self.routes) * _WIDTH:]
+
+    # a replacement worker takes over the row of the one that died; requests
+    # that died with it are no longer in flight
+    def attach(self, worker):
+        self.worker = worker
+        self._in_flight[worker] = 0
+
+    def started(self):
+        with self._lock:
+            self._in_flight[self.worker] += 1
+
+    def finished(self, route, elapsed_ms, status):
+        row = self._latency[self.worker, self._index.get(route, self._index[UNMATCHED])]
+        with self._lock:
+            self._in_flight[self.worker] -= 1
+            row[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            row[_COUNT] += 1
+            row[_SUM] += elapsed_ms
+            if status >= 500:
+                row[_ERRORS] += 1
+
+    def snapshot(self):
+        totals = self._latency.sum(axis=0)
+        routes = {}
+        for route, row in zip(self.routes, totals.tolist()):
+            count = int(row[_COUNT])
+            if not count:
+                continue
+            cumulative = np.cumsum(row[:_COUNT]).astype(int).tolist()
+            routes[route] = {
+                "count": count,
+                "errors": int(row[_ERRORS]),
+                "sum_ms": round(row[_SUM], 3),
+                "mean_ms": round(row[_SUM] / count, 3),
+                "p50_ms": _bucket_quantile(cumulative, 0.50),
+                "p95_ms": _bucket_quantile(cumulative, 0.95),
+                "p99_ms": _bucket_quantile(cumulative, 0.99),
+                "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], cumulative)),
+            }
+        in_flight = self._in_flight.astype(int).tolist()
+        return {
+            "workers": self.workers,
+            "in_flight": sum(in_flight),
+            "in_flight_per_worker": in_flight,
+            "requests": int(totals[:, _COUNT].sum()),
+            "routes": routes,
+        }
+
+
+# upper bound of the bucket holding the q-th request (None past the last bound)
+def _bucket_quantile(cumulative, q):
+    rank = q * cumulative[-1]
+    for bound, seen in zip(LATENCY_BUCKETS_MS, cumulative):
+        if seen >= rank:
+            return bound
+    return None
+
+
+def render_prometheus(snapshot, caches):
+    lines = [
+        "# TYPE sentiment_http_in_flight gauge",
+        f"sentiment_http_in_flight {snapshot['in_flight']}",
+        "# TYPE sentiment_http_request_duration_ms histogram",
+    ]
+    for route, stats in snapshot["routes"].items():
+        for bound, count in stats["buckets"].items():
+            lines.append(f'sentiment_http_request_duration_ms_bucket{{route="{route}",le="{bound}"}} {count}')
+        lines.append(f'sentiment_http_request_duration_ms_sum{{route="{route}"}} {stats["sum_ms"]}')
+        lines.append(f'sentiment_http_request_duration_ms_count{{route="{route}"}} {stats["count"]}')
+    lines.append("# TYPE sentiment_http_errors_total counter")
+    for route, stats in snapshot["routes"].items():
+        lines.append(f'sentiment_http_errors_total{{route="{route}"}} {stats["errors"]}')
+    lines.append("# TYPE sentiment_cache gauge")
+    for cache, stats in caches.items():
+        for name, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'sentiment_cache{{cache="{cache}",stat="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,6 @@
-from app import app, db
+from app import app, init_db
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,110 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as app_module
+from app import app, init_db
+
+# Production entry point. The master imports the app once, creates the schema
+# once, sets up the shared caches and metrics, binds the listening socket and
+# then forks the workers, which inherit all of it. Each worker runs a threaded
+# WSGI server on the shared socket (the kernel spreads accepts across them).
+# Crashed workers are replaced; SIGTERM/SIGINT stop everything.
+# run.py stays the local development server.
+
+
+class RequestHandler(WSGIRequestHandler):
+    access_log = False
+
+    def log_request(self, code="-", size="-"):
+        if self.access_log:
+            super().log_request(code, size)
+
+
+def serve_worker(index, listener, args):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    master = os.getppid()
+    app_module.worker_started(index)
+    server = make_server(
+        args.host, args.port, app, threaded=True, request_handler=RequestHandler, fd=listener.fileno(),
+    )
+
+    # a worker whose master was killed outright stops instead of lingering
+    def watch_master():
+        while os.getppid() == master:
+            time.sleep(1)
+        server.shutdown()
+
+    threading.Thread(target=watch_master, daemon=True).start()
+    server.serve_forever()
+
+
+def spawn(index, listener, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            serve_worker(index, listener, args)
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the sentiment API with N preforked workers.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--access-log", action="store_true", default=bool(os.environ.get("ACCESS_LOG")))
+    args = parser.parse_args()
+    RequestHandler.access_log = args.access_log
+
+    with app.app_context():
+        init_db()
+    app_module.configure_workers(args.workers)
+
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} worker(s)", file=sys.stderr, flush=True)
+
+    workers = {spawn(index, listener, args): index for index in range(args.workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) exited with status {status}, restarting", file=sys.stderr, flush=True)
+        time.sleep(1)
+        if not stopping:
+            workers[spawn(index, listener, args)] = index
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
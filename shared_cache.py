@@ -0,0 +1,179 @@
+import hashlib
+import mmap
+import multiprocessing
+import pickle
+import struct
+import time
+
+# === SHARED MEMORY CACHE ===
+# A set-associative hash table in an anonymous shared mmap. It is created in
+# the master before the workers fork, so every worker maps the same pages and
+# sees what the others stored. Keys are hashed to a set of `ways` slots;
+# values are pickled into the slot (entries larger than slot_size are simply
+# not shared). A full set evicts its least recently used slot. Each group of
+# sets has its own lock, and the counters live in the mmap too, so stats()
+# already covers every worker.
+#
+# Layout: [counters: locks x COUNTERS] [headers: slots x SLOT] [data: slots x slot_size]
+# Timestamps are time.monotonic(), which is system-wide on Linux.
+
+SLOT = struct.Struct("16sddI4x")  # key digest, stored_at, used_at, length
+COUNTERS = ("hits", "stale_hits", "misses", "sets", "evictions", "expired", "too_large")
+_COUNTER = struct.Struct("Q")
+
+
+class SharedCache:
+    def __init__(self, slots=1024, slot_size=4096, ways=8, ttl=None, stale_ttl=0, locks=16):
+        self.ways = ways
+        self.sets = max(1, slots // ways)
+        self.slots = self.sets * ways
+        self.slot_size = slot_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._locks = [multiprocessing.Lock() for _ in range(min(locks, self.sets))]
+
+        self._headers = len(self._locks) * len(COUNTERS) * _COUNTER.size
+        self._data = self._headers + self.slots * SLOT.size
+        self._map = mmap.mmap(-1, self._data + self.slots * slot_size)
+
+    # same contract as TTLCache.get: (value, is_fresh) or None
+    def get(self, key):
+        digest = self._digest(key)
+        index = self._set(digest)
+        with self._lock(index):
+            slot = self._find(index, digest)
+            if slot is None:
+                self._count(index, "misses")
+                return None
+            _, stored_at, _, length = self._header(slot)
+            now = time.monotonic()
+            age = now - stored_at
+            if self.ttl is not None and age > self.ttl + self.stale_ttl:
+                self._write_header(slot, b"", 0.0, 0.0, 0)
+                self._count(index, "expired")
+                self._count(index, "misses")
+                return None
+            fresh = self.ttl is None or age <= self.ttl
+            self._count(index, "hits" if fresh else "stale_hits")
+            self._write_header(slot, digest, stored_at, now, length)
+            start = self._data + slot * self.slot_size
+            payload = self._map[start:start + length]
+        return pickle.loads(payload), fresh
+
+    def set(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = self._digest(key)
+        index = self._set(digest)
+        with self._lock(index):
+            if len(payload) > self.slot_size:
+                self._count(index, "too_large")
+                return
+            slot = self._find(index, digest)
+            if slot is None:
+                slot = self._victim(index)
+            start = self._data + slot * self.slot_size
+            self._map[start:start + len(payload)] = payload
+            now = time.monotonic()
+            self._write_header(slot, digest, now, now, len(payload))
+            self._count(index, "sets")
+
+    def clear(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for slot in range(self.slots):
+                self._write_header(slot, b"", 0.0, 0.0, 0)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def stats(self):
+        totals = dict.fromkeys(COUNTERS, 0)
+        for i in range(len(self._locks)):
+            for j, name in enumerate(COUNTERS):
+                totals[name] += _COUNTER.unpack_from(self._map, (i * len(COUNTERS) + j) * _COUNTER.size)[0]
+        totals.update(entries=len(self), slots=self.slots, slot_size=self.slot_size)
+        return totals
+
+    def __len__(self):
+        return sum(1 for slot in range(self.slots) if self._header(slot)[3])
+
+    def _digest(self, key):
+        return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).digest()
+
+    def _set(self, digest):
+        return int.from_bytes(digest[:8], "little") % self.sets
+
+    def _lock(self, index):
+        return self._locks[index % len(self._locks)]
+
+    def _header(self, slot):
+        return SLOT.unpack_from(self._map, self._headers + slot * SLOT.size)
+
+    def _write_header(self, slot, digest, stored_at, used_at, length):
+        SLOT.pack_into(self._map, self._headers + slot * SLOT.size, digest, stored_at, used_at, length)
+
+    def _find(self, index, digest):
+        for slot in range(index * self.ways, (index + 1) * self.ways):
+            stored, _, _, length = self._header(slot)
+            if length and stored == digest:
+                return slot
+        return None
+
+    # an empty slot, else the least recently used one
+    def _victim(self, index):
+        oldest, oldest_used = None, None
+        for slot in range(index * self.ways, (index + 1) * self.ways):
+            _, _, used_at, length = self._header(slot)
+            if not length:
+                return slot
+            if oldest is None or used_at < oldest_used:
+                oldest, oldest_used = slot, used_at
+        self._count(index, "evictions")
+        return oldest
+
+    def _count(self, index, name):
+        offset = ((index % len(self._locks)) * len(COUNTERS) + COUNTERS.index(name)) * _COUNTER.size
+        _COUNTER.pack_into(self._map, offset, _COUNTER.unpack_from(self._map, offset)[0] + 1)
+
+
+# === SHARED RING ===
+# The last `size` items appended by any worker, oldest first. Same mmap and
+# pickle approach as SharedCache; an item larger than slot_size is dropped.
+_SEQ = struct.Struct("Q")
+_LENGTH = struct.Struct("I")
+
+
+class SharedRing:
+    def __init__(self, size=500, slot_size=1024):
+        self.size = size
+        self.slot_size = slot_size
+        self._lock = multiprocessing.Lock()
+        self._stride = _LENGTH.size + slot_size
+        self._map = mmap.mmap(-1, _SEQ.size + size * self._stride)
+
+    def extend(self, items):
+        payloads = [pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL) for item in items]
+        with self._lock:
+            seq = _SEQ.unpack_from(self._map, 0)[0]
+            for payload in payloads:
+                if len(payload) > self.slot_size:
+                    continue
+                start = _SEQ.size + (seq % self.size) * self._stride
+                _LENGTH.pack_into(self._map, start, len(payload))
+                self._map[start + _LENGTH.size:start + _LENGTH.size + len(payload)] = payload
+                seq += 1
+            _SEQ.pack_into(self._map, 0, seq)
+
+    def items(self):
+        with self._lock:
+            seq = _SEQ.unpack_from(self._map, 0)[0]
+            payloads = []
+            for i in range(seq - min(seq, self.size), seq):
+                start = _SEQ.size + (i % self.size) * self._stride
+                length = _LENGTH.unpack_from(self._map, start)[0]
+                payloads.append(self._map[start + _LENGTH.size:start + _LENGTH.size + length])
+        return [pickle.loads(payload) for payload in payloads]
+
+    def __len__(self):
+        return min(_SEQ.unpack_from(self._map, 0)[0], self.size)
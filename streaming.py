@@ -0,0 +1,139 @@
+import json
+import queue
+import threading
+
+# === SERVER-SENT EVENTS ===
+# One producer thread per coin polls for the newest point and fans it out to
+# every subscriber of that coin. Each event is encoded once and the same bytes
+# are queued for all clients. Queues are bounded: a client that falls
+# queue_size events behind is dropped (EventSource reconnects on its own)
+# instead of growing memory.
+
+
+def encode_event(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscriber:
+    def __init__(self, coin_id, duration, queue_size):
+        self.coin_id = coin_id
+        self.duration = duration
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def wants(self, timestamp):
+        # hourly ranges only get the points that start an hour, and so on
+        return timestamp % self.duration == 0
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        self.closed = True
+        with self.queue.mutex:
+            self.queue.queue.clear()
+        self.queue.put_nowait(None)
+
+    def iter_messages(self, heartbeat=15.0):
+        while True:
+            try:
+                message = self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+
+
+class CoinStream:
+    def __init__(self, hub, coin_id):
+        self.hub = hub
+        self.coin_id = coin_id
+        self.subscribers = set()
+        self.last_timestamp = None
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"stream-{coin_id}", daemon=True)
+
+    def _run(self):
+        while not self.stop.is_set():
+            try:
+                self._tick()
+            except Exception:
+                self.hub.count("producer_errors")
+            self.stop.wait(self.hub.interval)
+
+    def _tick(self):
+        timestamp, events = self.hub.produce(self.coin_id)
+        if timestamp == self.last_timestamp:
+            return
+        self.last_timestamp = timestamp
+
+        encoded = [(event, encode_event(event, data, timestamp)) for event, data in events]
+        self.hub.count("events", len(encoded))
+        with self.hub.lock:
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            for event, message in encoded:
+                if event == "point" and not subscriber.wants(timestamp):
+                    continue
+                if not subscriber.offer(message):
+                    self.hub.drop(subscriber)
+                    break
+
+
+class StreamHub:
+    def __init__(self, produce, interval=1.0, queue_size=64):
+        self.produce = produce
+        self.interval = interval
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.streams = {}
+        self._stats = {"subscribed": 0, "unsubscribed": 0, "dropped": 0, "events": 0, "producer_errors": 0}
+
+    def subscribe(self, coin_id, duration):
+        subscriber = Subscriber(coin_id, duration, self.queue_size)
+        with self.lock:
+            stream = self.streams.get(coin_id)
+            if stream is None:
+                stream = self.streams[coin_id] = CoinStream(self, coin_id)
+                stream.thread.start()
+            stream.subscribers.add(subscriber)
+            self._stats["subscribed"] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            stream = self.streams.get(subscriber.coin_id)
+            if stream is None or subscriber not in stream.subscribers:
+                return
+            stream.subscribers.discard(subscriber)
+            self._stats["unsubscribed"] += 1
+            if not stream.subscribers:
+                stream.stop.set()
+                del self.streams[subscriber.coin_id]
+
+    def drop(self, subscriber):
+        self.unsubscribe(subscriber)
+        subscriber.close()
+        self.count("dropped")
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self._stats)
+            stats["producers"] = len(self.streams)
+            stats["subscribers"] = sum(len(stream.subscribers) for stream in self.streams.values())
+        return stats
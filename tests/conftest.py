@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# app.py reads DATABASE_URL at import time; never touch instance/sentiment.db
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="sentiment-tests-"), "test.db"))
@@ -0,0 +1,113 @@
+from alerts import AlertEngine, SharedAlertState
+
+
+def alert(alert_id, threshold, condition="above", alert_type="overall", coin_id="bitcoin", enabled=True):
+    return {"id": alert_id, "coin_id": coin_id, "alert_type": alert_type, "condition": condition,
+            "threshold": threshold, "enabled": enabled}
+
+
+def fired_ids(engine, timestamp, overall, coin_id="bitcoin"):
+    return sorted(event["alert_id"] for event in engine.evaluate(coin_id, timestamp, {"overall": overall}))
+
+
+def test_above_fires_when_previous_at_or_below_and_current_above():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10), alert(2, 20), alert(3, 30)])
+    assert fired_ids(engine, 1, 10) == []  # first point only sets the baseline
+    # previous <= t < current: 10 (== previous) and 20 fire, 30 (== current) does not
+    assert fired_ids(engine, 2, 30) == [1, 2]
+    assert fired_ids(engine, 3, 31) == [3]
+
+
+def test_below_fires_when_current_below_and_previous_at_or_above():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10, "below"), alert(2, 20, "below"), alert(3, 30, "below")])
+    fired_ids(engine, 1, 30)
+    # current < t <= previous: 30 (== previous) and 20 fire, 10 (== current) does not
+    assert fired_ids(engine, 2, 10) == [2, 3]
+    assert fired_ids(engine, 3, 9) == [1]
+
+
+def test_staying_across_a_threshold_does_not_fire_again():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10)])
+    fired_ids(engine, 1, 0)
+    assert fired_ids(engine, 2, 15) == [1]
+    assert fired_ids(engine, 3, 20) == []
+    assert fired_ids(engine, 4, 5) == []
+    assert fired_ids(engine, 5, 15) == [1]
+
+
+def test_a_timestamp_is_evaluated_once():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10)])
+    fired_ids(engine, 1, 0)
+    assert fired_ids(engine, 2, 15) == [1]
+    assert fired_ids(engine, 2, 0) == []
+    assert fired_ids(engine, 1, 15) == []
+
+
+def test_remove_takes_out_the_right_duplicate_threshold():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10), alert(2, 10), alert(3, 10)])
+    engine.remove(2)
+    fired_ids(engine, 1, 0)
+    assert fired_ids(engine, 2, 15) == [1, 3]
+    assert len(engine) == 2
+
+
+def test_add_replaces_and_disable_removes():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10)])
+    engine.add(alert(1, 50))
+    engine.add(alert(2, 20, enabled=False))
+    fired_ids(engine, 1, 0)
+    assert fired_ids(engine, 2, 30) == []
+    assert fired_ids(engine, 3, 60) == [1]
+    assert len(engine) == 1
+
+
+def test_alerts_are_scoped_to_coin_and_type():
+    engine = AlertEngine()
+    engine.rebuild([alert(1, 10), alert(2, 10, coin_id="ethereum"), alert(3, 10, alert_type="positive")])
+    fired_ids(engine, 1, 0)
+    assert fired_ids(engine, 2, 20) == [1]
+    assert [event["alert_id"] for event in engine.fired_since(coin_id="bitcoin")] == [1]
+    assert engine.fired_since(timestamp=2) == []
+
+
+def test_shared_state_fires_a_crossing_once_across_workers():
+    shared = SharedAlertState()
+    a, b = AlertEngine(shared=shared), AlertEngine(shared=shared)
+    for engine in (a, b):
+        engine.rebuild([alert(1, 10)], shared.version)
+    assert fired_ids(a, 1, 0) == []
+    assert fired_ids(b, 2, 15) == [1]
+    assert fired_ids(a, 2, 15) == []
+    assert [event["alert_id"] for event in a.fired_since()] == [1]
+
+
+def test_a_change_in_one_worker_makes_the_others_stale():
+    shared = SharedAlertState()
+    a, b = AlertEngine(shared=shared), AlertEngine(shared=shared)
+    for engine in (a, b):
+        engine.rebuild([alert(1, 10)], shared.version)
+    a.remove(1)
+    a.changed()
+    assert not a.stale()
+    assert b.stale()
+    b.rebuild([], shared.version)
+    assert not b.stale()
+
+
+def test_last_points_are_bounded():
+    engine = AlertEngine(coins=3)
+    engine.rebuild([alert(1, 10)])
+    fired_ids(engine, 1, 0)
+    for i in range(5):
+        fired_ids(engine, 1, 0, coin_id=f"coin-{i}")
+    assert len(engine._last) == 3
+    # bitcoin's baseline was evicted: this point only sets a new one
+    assert fired_ids(engine, 2, 15) == []
+    assert fired_ids(engine, 3, 5) == []
+    assert fired_ids(engine, 4, 15) == [1]
@@ -0,0 +1,98 @@
+import gzip
+
+import pytest
+
+import app as app_module
+from app import app, init_db
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        init_db()
+    return app.test_client()
+
+
+ALERT = {"coinId": "bitcoin", "type": "overall", "condition": "above", "threshold": 10}
+
+
+@pytest.mark.parametrize("enabled", ["false", "true", 0, 1, None, [], {}])
+def test_alert_enabled_must_be_a_json_boolean(client, enabled):
+    response = client.post("/api/alerts", json=dict(ALERT, enabled=enabled))
+    assert response.status_code == 400
+    assert "enabled" in response.get_json()["error"]
+
+
+def test_alert_enabled_boolean_is_stored(client):
+    created = client.post("/api/alerts", json=dict(ALERT, enabled=False)).get_json()
+    assert created["enabled"] is False
+    updated = client.put(f"/api/alerts/{created['id']}", json={"enabled": True}).get_json()
+    assert updated["enabled"] is True
+    assert client.put(f"/api/alerts/{created['id']}", json={"enabled": "false"}).status_code == 400
+    assert client.delete(f"/api/alerts/{created['id']}").status_code == 204
+
+
+@pytest.mark.parametrize("threshold", ["nan", "inf", "-inf", "abc", None])
+def test_alert_threshold_must_be_finite(client, threshold):
+    assert client.post("/api/alerts", json=dict(ALERT, threshold=threshold)).status_code == 400
+
+
+def test_sentiment_etag_round_trip_returns_304_without_body(client):
+    first = client.get("/api/sentiment/bitcoin?timeRange=1d")
+    assert first.status_code == 200
+    assert first.headers["Vary"] == "Accept-Encoding"
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/api/sentiment/bitcoin?timeRange=1d", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_sentiment_etag_depends_on_encoding_and_format(client):
+    etags = {
+        client.get("/api/sentiment/bitcoin?timeRange=1d", headers=headers).headers["ETag"]
+        for headers in ({}, {"Accept-Encoding": "gzip"})
+    }
+    etags.add(client.get("/api/sentiment/bitcoin?timeRange=1d&format=columnar").headers["ETag"])
+    assert len(etags) == 3
+
+
+def test_sentiment_gzip_body_matches_identity(client):
+    plain = client.get("/api/sentiment/bitcoin?timeRange=6h")
+    compressed = client.get("/api/sentiment/bitcoin?timeRange=6h", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+def test_sentiment_columnar_shape_matches_points(client):
+    points = client.get("/api/sentiment/bitcoin?timeRange=1d").get_json()
+    columnar = client.get("/api/sentiment/bitcoin?timeRange=1d&format=columnar").get_json()
+    assert columnar["coin_id"] == "bitcoin"
+    assert columnar["time_range"] == "1d"
+    assert columnar["count"] == len(points) == 24
+    columns = columnar["columns"]
+    assert columns["timestamp"] == [p["timestamp"] for p in points]
+    assert columns["overall"] == [p["overall"] for p in points]
+    assert all(len(values) == 24 for values in columns.values())
+
+
+@pytest.mark.parametrize("path", ["/api/sentiment/bitcoin?format=xml", "/api/sentiment/batch?format=xml"])
+def test_unknown_sentiment_format_is_rejected(client, path):
+    assert client.get(path).status_code == 400
+
+
+def test_batch_columnar(client):
+    data = client.get("/api/sentiment/batch?coins=bitcoin,ethereum&timeRanges=1h&format=columnar").get_json()
+    assert set(data) == {"bitcoin", "ethereum"}
+    assert len(data["bitcoin"]["1h"]["timestamp"]) == 60
+
+
+def test_summary_only_for_known_coins(client):
+    assert client.get("/api/summary/made-up-coin").status_code == 404
+    assert "made-up-coin" not in app_module.indicator_states
+    summary = client.get("/api/summary/bitcoin").get_json()
+    assert summary["coin_id"] == "bitcoin"
+    assert 0 <= summary["rsi"] <= 100
+    assert set(summary["rollups"]) == {"1m", "5m", "1h"}
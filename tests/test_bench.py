@@ -0,0 +1,31 @@
+from bench import compare
+
+
+def metrics(changes):
+    return {change["metric"]: change["regression"] for change in changes}
+
+
+def test_costs_regress_when_they_grow():
+    baseline = {"alerts": {"rebuild_ms": 10, "random_walk": {"evaluate_p50_us": 10}, "linear_scan_mean_us": 100},
+                "serialization": {"points": {"payload_bytes": 1000, "gzip_payload_bytes": 100}}}
+    current = {"alerts": {"rebuild_ms": 10.5, "random_walk": {"evaluate_p50_us": 20}, "linear_scan_mean_us": 100},
+               "serialization": {"points": {"payload_bytes": 1000, "gzip_payload_bytes": 200}}}
+    assert metrics(compare(baseline, current)) == {
+        "alerts.rebuild_ms": False,
+        "alerts.random_walk.evaluate_p50_us": True,
+        "alerts.linear_scan_mean_us": False,
+        "serialization.points.payload_bytes": False,
+        "serialization.points.gzip_payload_bytes": True,
+    }
+
+
+def test_throughput_regresses_when_it_drops():
+    changes = compare({"load": {"requests_per_s": 100}, "g": {"speedup": 5}},
+                      {"load": {"requests_per_s": 85}, "g": {"speedup": 6}})
+    assert metrics(changes) == {"load.requests_per_s": True, "g.speedup": False}
+
+
+def test_settings_and_legacy_baseline_are_not_compared():
+    changes = compare({"load": {"duration_s": 5, "threads": 8}, "g": {"legacy_ms": 1, "coins": 5}},
+                      {"load": {"duration_s": 9, "threads": 16}, "g": {"legacy_ms": 3, "coins": 7}})
+    assert changes == []
@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app import SentimentAPI
+from exporters import (
+    EXPORT_OPTIONS, MARKET_CONTEXT_FIELDS, RAW_SENTIMENT_FIELDS, SOURCE_FIELDS, TECHNICAL_FIELDS,
+    gzip_stream, stream_csv, stream_json, stream_ml_ready, stream_npz,
+)
+
+NOW = 1_790_000_000.0
+COINS = ["bitcoin", "ethereum"]
+COUNT = 250
+
+
+def chunks(chunk_size=100):
+    return SentimentAPI.iter_export_chunks(COINS, "1h", COUNT, NOW, chunk_size=chunk_size)
+
+
+def metadata():
+    return {
+        "dataset_name": "test", "coin_ids": COINS, "coin_names": {c: c.title() for c in COINS},
+        "time_range": "1h", "current_price": None, "export_timestamp": "2026-01-01T00:00:00",
+        "samples": COUNT * len(COINS),
+    }
+
+
+def all_on():
+    return {name: True for name in EXPORT_OPTIONS}
+
+
+def read_csv(options):
+    text = "".join(stream_csv(chunks(), options, metadata()))
+    return list(csv.reader(io.StringIO(text)))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_npz_loads_with_numpy(compress):
+    data = b"".join(stream_npz(chunks(), all_on(), metadata(), compress=compress))
+    with np.load(io.BytesIO(data)) as archive:
+        assert archive["coin_ids"].tolist() == COINS
+        assert len(archive["timestamp"]) == COUNT * len(COINS)
+        assert archive["coin"].tolist() == [0] * COUNT + [1] * COUNT
+        assert np.all(np.diff(archive["timestamp"][:COUNT].astype(np.int64)) == 60)
+        assert archive["market_phase"].dtype == np.int8
+        for field in RAW_SENTIMENT_FIELDS + TECHNICAL_FIELDS:
+            assert len(archive[field]) == COUNT * len(COINS)
+
+
+def test_gzip_stream_decompresses_to_the_same_csv():
+    plain = "".join(stream_csv(chunks(), all_on(), metadata())).encode("utf-8")
+    compressed = b"".join(gzip_stream(stream_csv(chunks(), all_on(), metadata())))
+    assert gzip.decompress(compressed) == plain
+
+
+def test_csv_has_one_row_per_point_regardless_of_chunking():
+    rows = read_csv(all_on())
+    assert len(rows) == 1 + COUNT * len(COINS)
+    assert "".join(stream_csv(chunks(7), all_on(), metadata())) == "".join(stream_csv(chunks(), all_on(), metadata()))
+
+
+@pytest.mark.parametrize("option, fields", [
+    ("includeRawSentiment", RAW_SENTIMENT_FIELDS),
+    ("includeTechnicalIndicators", TECHNICAL_FIELDS),
+    ("includeMarketContext", MARKET_CONTEXT_FIELDS),
+    ("includeSources", SOURCE_FIELDS),
+])
+def test_turning_an_option_off_drops_its_columns(option, fields):
+    header = read_csv(dict(all_on(), **{option: False}))[0]
+    assert not set(fields) & set(header)
+    others = [f for name, group in EXPORT_OPTIONS.items() if name != option for f in group]
+    assert set(others) <= set(header)
+
+
+def test_metadata_option_controls_metadata_columns():
+    assert "export_timestamp" in read_csv(all_on())[0]
+    assert "export_timestamp" not in read_csv(dict(all_on(), includeMetadata=False))[0]
+
+
+def test_json_is_valid_with_every_group_off():
+    options = {name: False for name in EXPORT_OPTIONS}
+    data = json.loads("".join(stream_json(chunks(), options, metadata())))
+    assert len(data["sentiment_data"]) == COUNT * len(COINS)
+    assert set(data["sentiment_data"][0]) == {"timestamp", "coin_id"}
+    assert "metadata" not in data
+
+
+def test_json_and_ml_ready_are_valid_with_everything_on():
+    data = json.loads("".join(stream_json(chunks(), all_on(), metadata())))
+    assert data["metadata"]["data_points"] == COUNT * len(COINS)
+    assert len(data["sentiment_data"]) == COUNT * len(COINS)
+
+    ml = json.loads("".join(stream_ml_ready(chunks(), all_on(), metadata())))
+    assert len(ml["data"]) == COUNT * len(COINS)
+    assert all(len(row["features"]) == ml["dataset_info"]["feature_count"] for row in ml["data"])
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from indicators import ROLLUPS, IndicatorState
+
+
+def minutes(n, seed=7):
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000 - 1_700_000_000 % 3600 + 60 * np.arange(n, dtype=np.int64) + 17 * 60
+    overall = 80 * np.tanh(np.cumsum(rng.normal(0, 3, n)) / 60)
+    volume = rng.uniform(1e6, 5e6, n)
+    return timestamps, overall, volume
+
+
+def stepped(timestamps, overall, volume):
+    state = IndicatorState()
+    for row in zip(timestamps.tolist(), overall.tolist(), volume.tolist()):
+        state.update(*row)
+    return state
+
+
+def assert_same_summary(a, b):
+    for name in ("timestamp", "rsi", "volume_sma", "volume_sma_ratio"):
+        assert a[name] == pytest.approx(b[name], rel=1e-7, abs=1e-7), name
+    for name in ("macd", "bollinger"):
+        if a[name] is None:
+            assert b[name] is None
+        else:
+            assert a[name] == pytest.approx(b[name], rel=1e-7, abs=1e-7), name
+    for name, _, _ in ROLLUPS:
+        assert len(a["rollups"][name]) == len(b["rollups"][name]), name
+        for x, y in zip(a["rollups"][name], b["rollups"][name]):
+            assert x == pytest.approx(y, rel=1e-9), name
+
+
+@pytest.mark.parametrize("n", [1, 5, 14, 15, 20, 27, 61, 301, 2880])
+def test_backfill_matches_update_loop(n):
+    series = minutes(n)
+    backfilled = IndicatorState()
+    backfilled.backfill(*series)
+    assert_same_summary(backfilled.summary(), stepped(*series).summary())
+
+
+def test_updates_after_backfill_match_update_loop():
+    timestamps, overall, volume = minutes(500)
+    state = IndicatorState()
+    state.backfill(timestamps[:400], overall[:400], volume[:400])
+    for row in zip(timestamps[400:].tolist(), overall[400:].tolist(), volume[400:].tolist()):
+        state.update(*row)
+    assert_same_summary(state.summary(), stepped(timestamps, overall, volume).summary())
+
+
+def test_old_and_repeated_points_are_ignored():
+    timestamps, overall, volume = minutes(50)
+    state = stepped(timestamps, overall, volume)
+    before = state.summary()
+    state.update(int(timestamps[-1]), 99.0, 1.0)
+    state.update(int(timestamps[10]), -99.0, 1.0)
+    assert_same_summary(state.summary(), before)
+
+
+def test_rollups_aggregate_minutes():
+    timestamps, overall, volume = minutes(180)
+    summary = stepped(timestamps, overall, volume).summary()
+    hour = summary["rollups"]["1h"][0]
+    first = timestamps < hour["timestamp"] + 3600
+    assert hour["count"] == first.sum()
+    assert hour["open"] == overall[0]
+    assert hour["close"] == overall[first][-1]
+    assert hour["high"] == overall[first].max()
+    assert hour["volume"] == pytest.approx(volume[first].sum())
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from market_data import MarketDataClient, UpstreamError
+
+
+# Local stand-in for CoinGecko's /coins/markets. Records every ids= it was
+# asked for and answers after `latency` seconds.
+class Stub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.prices = {"bitcoin": 100.0, "ethereum": 10.0}
+        self.status = 200
+        self.calls = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                ids = parse_qs(urlparse(self.path).query)["ids"][0].split(",")
+                stub.calls.append(ids)
+                time.sleep(stub.latency)
+                body = json.dumps([
+                    {"id": coin_id, "current_price": stub.prices[coin_id]} for coin_id in ids if coin_id in stub.prices
+                ]).encode("utf-8")
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = Stub()
+    yield stub
+    stub.close()
+
+
+def test_concurrent_misses_make_one_upstream_call(stub):
+    stub.latency = 0.2
+    client = MarketDataClient(base_url=stub.url)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_coin("bitcoin"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stub.calls) == 1
+    assert [r["current_price"] for r in results] == [100.0] * 10
+    assert client.stats()["coalesced"] == 9
+
+
+def test_popular_coin_miss_refreshes_all_bulk_ids(stub):
+    client = MarketDataClient(base_url=stub.url, bulk_ids=["bitcoin", "ethereum"])
+    assert client.get_coin("bitcoin")["current_price"] == 100.0
+    assert client.get_coin("ethereum")["current_price"] == 10.0
+    assert stub.calls == [["bitcoin", "ethereum"]]
+
+
+def test_unknown_coin_is_negatively_cached(stub):
+    client = MarketDataClient(base_url=stub.url)
+    assert client.get_coin("nope") is None
+    assert client.get_coin("nope") is None
+    assert stub.calls == [["nope"]]
+
+
+def test_stale_value_is_served_then_refreshed(stub):
+    client = MarketDataClient(base_url=stub.url, ttl=0.1, stale_ttl=60)
+    assert client.get_coin("bitcoin")["current_price"] == 100.0
+    stub.prices["bitcoin"] = 200.0
+    time.sleep(0.15)
+
+    assert client.get_coin("bitcoin")["current_price"] == 100.0
+    assert client.stats()["stale_hits"] == 1
+    deadline = time.monotonic() + 5
+    while client.cache.get("bitcoin")[0]["current_price"] != 200.0:
+        assert time.monotonic() < deadline, "stale entry was never revalidated"
+        time.sleep(0.01)
+    assert len(stub.calls) == 2
+    assert client.get_coin("bitcoin")["current_price"] == 200.0
+
+
+def test_upstream_error_is_raised_and_not_cached(stub):
+    stub.status = 429
+    client = MarketDataClient(base_url=stub.url)
+    with pytest.raises(UpstreamError) as error:
+        client.get_coin("bitcoin")
+    assert error.value.status_code == 429
+
+    stub.status = 200
+    assert client.get_coin("bitcoin")["current_price"] == 100.0
+    assert len(stub.calls) == 2
@@ -0,0 +1,158 @@
+import os
+import time
+
+import pytest
+
+from metrics import UNMATCHED, MetricsBoard
+from shared_cache import SharedCache, SharedRing
+
+
+# runs fn in a forked child, the way serve.py workers inherit the mmaps;
+# assertions inside fn fail the test through the exit code
+def in_child(fn):
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            fn()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_values_cross_the_fork_both_ways():
+    cache = SharedCache(slots=64, slot_size=256)
+    cache.set("from-parent", {"price": 1.5})
+
+    def child():
+        assert cache.get("from-parent") == ({"price": 1.5}, True)
+        cache.set("from-child", [1, 2, 3])
+
+    in_child(child)
+    assert cache.get("from-child") == ([1, 2, 3], True)
+    assert len(cache) == 2
+
+
+def test_full_set_evicts_least_recently_used():
+    cache = SharedCache(slots=4, slot_size=64, ways=4)
+    for i in range(4):
+        cache.set(i, i)
+        time.sleep(0.001)
+    cache.get(0)
+    time.sleep(0.001)
+    cache.set(4, 4)
+
+    assert cache.get(1) is None
+    assert [cache.get(i)[0] for i in (0, 2, 3, 4)] == [0, 2, 3, 4]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_overwriting_a_key_reuses_its_slot():
+    cache = SharedCache(slots=4, slot_size=64, ways=4)
+    for _ in range(10):
+        cache.set("key", "value")
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 0
+
+
+def test_ttl_then_stale_then_expired():
+    cache = SharedCache(slots=8, slot_size=64, ttl=0.3, stale_ttl=0.3)
+    cache.set("coin", 1)
+    assert cache.get("coin") == (1, True)
+    time.sleep(0.4)
+    assert cache.get("coin") == (1, False)
+    time.sleep(0.3)
+    assert cache.get("coin") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["expired"], stats["misses"]) == (1, 1, 1, 1)
+    assert len(cache) == 0
+
+
+def test_oversized_values_are_counted_and_not_stored():
+    cache = SharedCache(slots=8, slot_size=64)
+    cache.set("big", "x" * 100)
+    assert cache.get("big") is None
+    assert cache.stats()["too_large"] == 1
+
+
+def test_counters_cover_every_process():
+    cache = SharedCache(slots=64, slot_size=64)
+    cache.set("a", 1)
+
+    def child():
+        for _ in range(3):
+            cache.get("a")
+        cache.get("missing")
+
+    in_child(child)
+    in_child(child)
+    cache.get("a")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (7, 2, 1)
+
+
+def test_clear_empties_every_slot():
+    cache = SharedCache(slots=64, slot_size=64)
+    for i in range(20):
+        cache.set(i, i)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(3) is None
+
+
+def test_ring_keeps_the_last_items_in_order_across_processes():
+    ring = SharedRing(size=5, slot_size=64)
+    ring.extend([0, 1])
+    in_child(lambda: ring.extend([2, 3, 4, 5]))
+    ring.extend([6])
+    assert ring.items() == [2, 3, 4, 5, 6]
+    assert len(ring) == 5
+
+
+def test_ring_drops_oversized_items():
+    ring = SharedRing(size=5, slot_size=64)
+    ring.extend(["a", "x" * 100, "b"])
+    assert ring.items() == ["a", "b"]
+
+
+def test_snapshot_adds_up_every_worker():
+    board = MetricsBoard(["/api/coins", "/api/sentiment/<coin_id>"], workers=3)
+
+    def worker(index):
+        def run():
+            board.attach(index)
+            for _ in range(index + 1):
+                board.started()
+                board.finished("/api/coins", 3.0, 200)
+            board.started()
+            board.finished("/api/sentiment/<coin_id>", 40.0, 500)
+            board.started()  # still in flight when the snapshot is taken
+        return run
+
+    in_child(worker(1))
+    in_child(worker(2))
+    board.started()
+    board.finished(None, 0.5, 404)
+
+    snapshot = board.snapshot()
+    coins = snapshot["routes"]["/api/coins"]
+    assert coins["count"] == 5
+    assert coins["sum_ms"] == pytest.approx(15.0)
+    assert coins["buckets"]["2.5"] == 0 and coins["buckets"]["5"] == 5
+    assert coins["p50_ms"] == 5
+    sentiment = snapshot["routes"]["/api/sentiment/<coin_id>"]
+    assert (sentiment["count"], sentiment["errors"]) == (2, 2)
+    assert snapshot["routes"][UNMATCHED]["count"] == 1
+    assert snapshot["requests"] == 8
+    assert snapshot["in_flight_per_worker"] == [0, 1, 1]
+    assert snapshot["in_flight"] == 2
+
+
+def test_attach_resets_a_replaced_workers_in_flight():
+    board = MetricsBoard(["/api/coins"], workers=2)
+    in_child(lambda: (board.attach(1), board.started(), board.started()))
+    assert board.snapshot()["in_flight_per_worker"] == [0, 2]
+    in_child(lambda: board.attach(1))
+    assert board.snapshot()["in_flight_per_worker"] == [0, 0]
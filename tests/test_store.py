@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app import SentimentData, SentimentSeries, SentimentStore, STORE_COLUMNS
+
+# recent enough that the automatic prune in ingest() keeps it
+NOW = float(int(time.time()) // 3600 * 3600 + 1234)
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    SentimentData.__table__.create(engine)
+    return SentimentStore(engine=engine, coin_ids=["bitcoin", "ethereum"])
+
+
+def rows(store, coin_id=None):
+    t = store.table
+    query = select(func.count()).select_from(t)
+    if coin_id is not None:
+        query = query.where(t.c.coin_id == coin_id)
+    with store.engine.connect() as conn:
+        return conn.execute(query).scalar()
+
+
+def expected(coin_ids, time_range, columnar=False, now=NOW):
+    series = SentimentSeries.generate(coin_ids, time_range, now)
+    convert = series.to_columns if columnar else series.to_points
+    return {coin_id: convert(row) for row, coin_id in enumerate(series.coin_ids)}
+
+
+@pytest.mark.parametrize("time_range", ["1h", "6h", "1d", "1w"])
+def test_load_ingests_then_reads_back_the_same_points(store, time_range):
+    first = store.load(["bitcoin", "ethereum"], time_range, NOW)
+    assert first == expected(["bitcoin", "ethereum"], time_range)
+    count = rows(store)
+    assert count == 2 * len(first["bitcoin"])
+
+    # second load is served from the table (_to_columns + build_points)
+    assert store.load(["bitcoin", "ethereum"], time_range, NOW) == first
+    assert rows(store) == count
+
+
+def test_columnar_load_matches_series_columns(store):
+    store.load(["bitcoin"], "1d", NOW)
+    assert store.load(["bitcoin"], "1d", NOW, columnar=True) == expected(["bitcoin"], "1d", columnar=True)
+
+
+def test_load_fills_gaps(store):
+    store.load(["bitcoin"], "1d", NOW)
+    t = store.table
+    with store.engine.begin() as conn:
+        oldest = conn.execute(select(func.min(t.c.timestamp))).scalar()
+        conn.execute(t.delete().where(t.c.timestamp == oldest))
+    assert rows(store) == 23
+
+    assert store.load(["bitcoin"], "1d", NOW) == expected(["bitcoin"], "1d")
+    assert rows(store) == 24
+
+
+def test_unknown_coins_are_served_but_not_stored(store):
+    result = store.load(["bitcoin", "made-up-coin"], "1w", NOW)
+    assert result == expected(["bitcoin", "made-up-coin"], "1w")
+    assert rows(store, "made-up-coin") == 0
+    assert rows(store, "bitcoin") == 168
+
+
+def test_prune_removes_rows_older_than_retention(store):
+    store.load(["bitcoin"], "1w", NOW)
+    assert rows(store) == 168
+    store.retention_days = 1
+    removed = store.prune(NOW)
+    assert removed == 168 - 24
+    assert rows(store) == 24
+
+
+def test_query_range_round_trips_points(store):
+    store.load(["bitcoin"], "6h", NOW)
+    points = expected(["bitcoin"], "6h")["bitcoin"]
+    start, end = np.datetime64(points[-1]["timestamp"]).item(), np.datetime64(points[0]["timestamp"]).item()
+    assert store.query_range("bitcoin", start, end) == points
+
+
+def test_store_columns_cover_the_model():
+    assert set(STORE_COLUMNS) < {column.name for column in SentimentData.__table__.columns}